@@ -18,6 +18,37 @@ def data_type(value):
     return value
 
 
+def null_type(value):
+    """
+    Integer >= 0, for the options where 0 disables the feature.
+    """
+    try:
+        value = int(value)
+    except ValueError as type_error:
+        raise argparse.ArgumentTypeError('Value must be an integer !') from type_error
+
+    if value < 0:
+        raise argparse.ArgumentTypeError('Value must be an integer >= 0')
+
+    return value
+
+
+def job_range(value):
+    """
+    Range of jobs START:END, with 1 <= START <= END.
+    """
+    try:
+        start, end = [int(ele) for ele in value.split(':')]
+    except ValueError as type_error:
+        raise argparse.ArgumentTypeError('Range must be START:END with integers !') \
+            from type_error
+
+    if start < 1 or end < start:
+        raise argparse.ArgumentTypeError('Range must be START:END with 1 <= START <= END')
+
+    return start, end
+
+
 def arguments():
     """
     Define arguments.
@@ -46,6 +77,12 @@ def arguments():
         " cluster, from 1 to 4225"
     )
 
+    group.add_argument(
+        '--job-range', dest='job_range', type=job_range,
+        help="Simulation with msprime for all tau & kappa from START to END (included) in the "
+        "same run, e.g. 1:25 - to process many cells with one job of the migale cluster"
+    )
+
     group.add_argument(
         '--file', dest='file', action='store_true',
         help="Determine the length factor for each (tau, kappa) pairs"
@@ -55,6 +92,148 @@ def arguments():
         '--typ', dest='typ', required=True, choices=['sfs', 'vcf'], default='sfs',
         help="Generate a set of SFS for Dadi & Stairway or a set of VCF for SMC++"
     )
+    data.add_argument(
+        '--workers', dest='workers', type=data_type, default=1,
+        help="Number of processes used to simulate the replicates of a set of SFS - by default"
+        " 1, i.e. the replicates are simulated one after another"
+    )
+    data.add_argument(
+        '--snp', dest='snp', type=data_type, default=None,
+        help="Simulate each SFS by chunks of genome until this number of SNPs, without the "
+        "length factor file - by default the length comes from the length factor file"
+    )
+    data.add_argument(
+        '--trim', dest='trim', action='store_true',
+        help="With --snp, trim the last chunk so each SFS has exactly the number of SNPs"
+    )
+    data.add_argument(
+        '--seed', dest='seed', type=int, default=None,
+        help="Base seed of the simulations, mixed into the seed of each replicate - by default "
+        "a random one, printed to reproduce the run"
+    )
+    data.add_argument(
+        '--trees', dest='trees', action='store_true',
+        help="With --typ vcf, archive the tree sequence of msprime instead of the variants"
+    )
+
+    #############################################
+    # Sweep over the grid of parameters         #
+    #############################################
+    sweep = subparsers.add_parser(
+        'sweep', help="Generate the data of the whole grid of parameters, or a slice of it, on a "
+        "local pool of processes"
+    )
+    sweep.add_argument(
+        '--model', dest='model', required=True, choices=['decline', 'migration'],
+        help="Kind of scenario to use for the generation of data with msprime"
+    )
+    sweep.add_argument(
+        '--typ', dest='typ', choices=['sfs', 'vcf'], default='sfs',
+        help="Generate a set of SFS for Dadi & Stairway or a set of VCF for SMC++"
+    )
+    sweep.add_argument(
+        '--start', dest='start', type=data_type, default=1,
+        help="First cell of the grid to simulate - by default 1"
+    )
+    sweep.add_argument(
+        '--end', dest='end', type=data_type, default=None,
+        help="Last cell of the grid to simulate (included) - by default the last one"
+    )
+    sweep.add_argument(
+        '--nb', dest='nb_simu', type=data_type, default=100,
+        help="Number of replicates for each cell of the grid - by default 100"
+    )
+    sweep.add_argument(
+        '--workers', dest='workers', type=data_type, default=None,
+        help="Number of processes - by default the number of cores"
+    )
+    sweep.add_argument(
+        '--snp', dest='snp', type=data_type, default=None,
+        help="Simulate each SFS by chunks of genome until this number of SNPs, without the "
+        "length factor file"
+    )
+    sweep.add_argument(
+        '--trim', dest='trim', action='store_true',
+        help="With --snp, trim the last chunk so each SFS has exactly the number of SNPs"
+    )
+    sweep.add_argument(
+        '--seed', dest='seed', type=int, default=None,
+        help="Base seed of the simulations, mixed into the seed of each replicate - by default "
+        "a random one, printed to reproduce the run"
+    )
+
+    #############################################
+    # Benchmark of the extrapolation of dadi    #
+    #############################################
+    bench = subparsers.add_parser(
+        'bench', help="Benchmark of the evaluation of the grid sizes of dadi - serial versus "
+        "concurrent"
+    )
+    bench.add_argument(
+        '--model', dest='model', choices=['decline', 'migration'], required=True,
+        help="Model evaluated, either decline or migration"
+    )
+    bench.add_argument(
+        '--sample', dest='sample', type=data_type, default=20,
+        help="Number of sampled monoploid genomes - by default 20"
+    )
+    bench.add_argument(
+        '--repeats', dest='repeats', type=data_type, default=10,
+        help="Number of evaluations of each version - by default 10"
+    )
+    bench.add_argument(
+        '--workers', dest='workers', type=data_type, default=3,
+        help="Number of threads or processes of the concurrent version - by default 3"
+    )
+    bench.add_argument(
+        '--backend', dest='backend', choices=['thread', 'process'], default='thread',
+        help="Pool of the concurrent version, either thread or process - by default thread"
+    )
+    bench.add_argument(
+        '--stages', dest='stages', action='store_true',
+        help="Execution time of each stage of the migration model for some cells of the grid "
+        "instead"
+    )
+
+    #############################################
+    # Expected-SFS bank of dadi                 #
+    #############################################
+    bank = subparsers.add_parser(
+        'bank', help="Compute the expected-SFS bank of a model for the warm start of the "
+        "inferences with dadi (inf --bank)"
+    )
+    bank.add_argument(
+        '--model', dest='model', choices=['decline', 'migration'], required=True,
+        help="Model of the inference, either decline or migration"
+    )
+    bank.add_argument(
+        '--sample', dest='sample', type=data_type, default=20,
+        help="Number of sampled monoploid genomes - by default 20"
+    )
+    bank.add_argument(
+        '--workers', dest='workers', type=data_type, default=1,
+        help="Number of processes on which the spectra of the bank are computed - by default 1"
+    )
+
+    #############################################
+    # Grid point of dadi                        #
+    #############################################
+    grid = subparsers.add_parser(
+        'grid', help="Benchmark of the grid point for the extrapolation of dadi, the cheapest "
+        "one within the tolerance is used by the inference"
+    )
+    grid.add_argument(
+        '--model', dest='model', choices=['decline', 'migration'], required=True,
+        help="Model of the inference, either decline or migration"
+    )
+    grid.add_argument(
+        '--sample', dest='sample', type=data_type, default=20,
+        help="Number of sampled monoploid genomes - by default 20"
+    )
+    grid.add_argument(
+        '--tol', dest='tol', type=float, default=0.1,
+        help="Tolerance on the log-likelihood compared to a finer grid - by default 0.1"
+    )
 
     #############################################
     # Msprime verification                      #
@@ -85,6 +264,10 @@ def arguments():
     optsmc.add_argument(
         '--job', dest='job', type=data_type, required=True, help="file to analyse"
     )
+    optsmc.add_argument(
+        '--trees', dest='trees', action='store_true',
+        help="Archive the tree sequence of msprime instead of the variants"
+    )
 
     #############################################
     # Optimisation SNPs                         #
@@ -118,15 +301,77 @@ def arguments():
                       help="Inference of demographic history with Dadi")
     inf.add_argument(
         '--param', dest="param", choices=['tau', 'kappa', 'm12'], default=None,
+        required='--profile' in sys.argv,
         help="Fixed parameters, either (tau), (kappa) or (m12), m12 is the migration rate from"
         " population 2 to 1."
     )
     inf.add_argument(
         '--value', dest='value', type=float, default=None,
-        required='--param' in sys.argv is not None,
+        required='--param' in sys.argv and '--profile' not in sys.argv,
         help="Value of the fixed parameters for the inference - value in log scale"
     )
 
+    inf.add_argument(
+        '--restarts', dest='restarts', type=data_type, default=2,
+        help="Number of inferences with dadi of the model M1 for each observed SFS, only the "
+        "best one is kept - by default 2"
+    )
+    inf.add_argument(
+        '--workers', dest='workers', type=data_type, default=1,
+        help="Number of processes on which the inferences of M1 are run - by default 1"
+    )
+    inf.add_argument(
+        '--bank', dest='bank', action='store_true',
+        help="Start one inference of M1 from the best point of the expected-SFS bank of the "
+        "model in Data/Dadi/Bank/ - built beforehand with the subcommand bank"
+    )
+    inf.add_argument(
+        '--optimizer', dest='optimizer', choices=['log', 'log_fmin', 'lbfgsb'], default='log',
+        help="Optimizer of dadi, either (log) BFGS, (log_fmin) Nelder-Mead or (lbfgsb) L-BFGS-B"
+        " - by default log"
+    )
+    inf.add_argument(
+        '--maxiter', dest='maxiter', type=data_type, default=1,
+        help="Maximum number of iterations of the optimizer of dadi - by default 1"
+    )
+    inf.add_argument(
+        '--maxfun', dest='maxfun', type=data_type, default=None,
+        help="Maximum number of evaluations of the model by the optimizer of dadi, only for "
+        "log_fmin - by default no limit"
+    )
+    inf.add_argument(
+        '--tol', dest='tol', type=float, default=1e-5,
+        help="Gradient tolerance for the convergence of the optimizer of dadi, not used by "
+        "log_fmin - by default 1e-5"
+    )
+    inf.add_argument(
+        '--agree', dest='agree', type=null_type, default=0,
+        help="Stop the inferences of M1 for an observed SFS once this number of them reach the "
+        "best log-likelihood - by default 0, i.e. all the restarts are run"
+    )
+    inf.add_argument(
+        '--grid-workers', dest='grid_workers', type=data_type, default=1,
+        help="Number of threads on which the grid sizes of the extrapolation of dadi are "
+        "evaluated concurrently - by default 1"
+    )
+    inf.add_argument(
+        '--coarse', dest='coarse', type=data_type, default=None,
+        help="Multi-fidelity - size of the coarse grid, without extrapolation, on which the "
+        "inferences of M1 explore before the best ones are optimized again on the extrapolated "
+        "grid - by default no multi-fidelity"
+    )
+    inf.add_argument(
+        '--candidates', dest='candidates', type=data_type, default=3,
+        help="Multi-fidelity - number of inferences of M1 optimized again on the extrapolated "
+        "grid - by default 3"
+    )
+    inf.add_argument(
+        '--profile', dest='profile', action='store_true',
+        help="Profile of the log-likelihood along all the values of the fixed parameter --param"
+        " in the same run, each inference starting from the optimum of the previous value - "
+        "--job is then any simulation of the grid, from 1 to 4225"
+    )
+
     # Stairway
     tool.add_argument('-stairway', action='store_true',
                       help="Inference of demographic history with Stairway plot 2")
@@ -141,11 +386,17 @@ def arguments():
         help="Simulation model used for the inference, in the case of dadi also indicate the "
         "population model for the inference"
     )
-    inf.add_argument(
-        '--job', dest='job', type=data_type, required=True,
+    jobs = inf.add_mutually_exclusive_group(required=True)
+    jobs.add_argument(
+        '--job', dest='job', type=data_type,
         help="Inference with dadi for a given tau/m12 & kappa - to sumit job-array with migale"
         " cluster, if param empty from 1 to 4225 else from 1 to 65"
     )
+    jobs.add_argument(
+        '--job-range', dest='job_range', type=job_range,
+        help="Inference for all tau/m12 & kappa from START to END (included) in the same run, "
+        "e.g. 1:25"
+    )
 
     # Optional argument
     inf.add_argument(
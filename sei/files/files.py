@@ -5,11 +5,18 @@ This module allows you to read or write files.
 import ast
 import copy
 import csv
+import gzip
+import hashlib
 import json
 import os
+import shutil
+import sqlite3
 import sys
+import tempfile
+import h5py
 import numpy as np
 import pandas as pd
+import tskit
 
 from itertools import islice
 
@@ -332,6 +339,549 @@ def read_stairway_summary(fichier):
     return data
 
 
+######################################################################
+# Grid points of dadi                                                #
+######################################################################
+
+def grid_points_table(fichier):
+    """
+    Lookup table of the grid points for the extrapolation with dadi - c.f. grid_optimisation.
+
+    Parameter
+    ---------
+    fichier: str
+        the json file of the table
+
+    Return
+    ------
+    table: dictionary
+        pts_list for each key model-sample - empty if the file doesn't exist
+    """
+    if not os.path.isfile(fichier):
+        return {}
+
+    with open(fichier, 'r') as filin:
+        return json.load(filin)
+
+
+def update_grid_points_table(fichier, model, sample, pts_list):
+    """
+    Record the grid points of a model and a sample size in the lookup table.
+
+    Parameter
+    ---------
+    fichier: str
+        the json file of the table
+    model: str
+        either decline or migration
+    sample: int
+        the number of sampled monoploid genomes
+    pts_list: list
+        the grid points for the extrapolation
+    """
+    table = grid_points_table(fichier)
+    table["{}-{}".format(model, sample)] = [int(pts) for pts in pts_list]
+
+    with open(fichier, 'w') as filout:
+        json.dump(table, filout, indent=2, sort_keys=True)
+
+
+######################################################################
+# Length factor of msprime                                           #
+######################################################################
+
+# Length factor tables already parsed, for each file its modification time and its table
+_LENGTH_FACTORS = {}
+
+
+def length_factor_key(params):
+    """
+    Key of the parameters in the length factor table.
+
+    The values are rounded to 2 decimal points - bug of to_json or from_json method of pandas,
+    some value of tau, kappa or m12 with many decimal points.
+    """
+    return tuple(sorted((key, round(value, 2)) for key, value in params.items()))
+
+
+def length_factor_table(fichier):
+    """
+    Lookup table of the length factors, parsed once per file.
+
+    Parameter
+    ---------
+    fichier: str
+        the json file of the length factors - pandas DataFrame with the columns Parameters and
+        Factor exported with to_json
+
+    Return
+    ------
+    table: dictionary
+        the factor for each key of the parameters - c.f. length_factor_key
+    """
+    mtime = os.path.getmtime(fichier)
+    if fichier not in _LENGTH_FACTORS or _LENGTH_FACTORS[fichier][0] != mtime:
+        with open(fichier, 'r') as filin:
+            res = json.load(filin)
+
+        table = {
+            length_factor_key(params): res['Factor'][row]
+            for row, params in res['Parameters'].items()
+        }
+        _LENGTH_FACTORS[fichier] = (mtime, table)
+
+    return _LENGTH_FACTORS[fichier][1]
+
+
+def length_factor(fichier, params):
+    """
+    Length factor of the parameters params, c.f. length_factor_table.
+    """
+    table = length_factor_table(fichier)
+    key = length_factor_key(params)
+
+    if key not in table:
+        sys.exit("Error \"length_factor\": no length factor for {} in {}"
+                 .format(params, fichier))
+
+    return table[key]
+
+
+######################################################################
+# Result store                                                       #
+######################################################################
+
+def flatten_record(record, groups):
+    """
+    Columns of a row of results, the dictionaries are split in one column per key.
+
+    E.g. {'Parameters': {'Tau': 0.1, 'Kappa': 10.}} gives the columns Parameters/Tau and
+    Parameters/Kappa. A column of groups without a dictionary in this row - e.g. NaN after a
+    concatenation - gives no column, its keys are missing.
+    """
+    columns = {}
+    for col, value in record.items():
+        if isinstance(value, dict):
+            columns.update({"{}/{}".format(col, key): val for key, val in value.items()})
+        elif col not in groups:
+            columns[col] = value
+
+    return columns
+
+
+# Kinds of the columns of the HDF5 result store, from the narrowest to the widest
+HDF5_KINDS = ['bool', 'int', 'float', 'text']
+HDF5_DTYPES = {'bool': bool, 'int': np.int64, 'float': np.float64}
+
+
+def hdf5_column(value):
+    """
+    Kind and shape of a value as stored in the HDF5 file.
+
+    Numeric values - scalar, SFS, list of SFS, etc. - are fixed-width bool, integer or float
+    arrays, the others - strings, list of dictionaries, ragged lists - are json text.
+    """
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        return 'text', ()  # Ragged lists
+
+    kind = {'b': 'bool', 'i': 'int', 'u': 'int', 'f': 'float'}.get(array.dtype.kind, 'text')
+
+    return kind, () if kind == 'text' else array.shape
+
+
+def hdf5_rows(values, kind, shape):
+    """
+    Array of the rows of a column of the HDF5 file - None for a missing value, i.e. NaN for the
+    numeric columns and null for the json text.
+    """
+    if kind == 'text':
+        return np.array(
+            [json.dumps(value, default=lambda obj: obj.tolist()) for value in values],
+            dtype=object
+        )
+
+    rows = np.empty((len(values),) + shape, dtype=HDF5_DTYPES[kind])
+    for row, value in enumerate(values):
+        rows[row] = np.nan if value is None else value
+
+    return rows
+
+
+def read_hdf5_column(dataset):
+    """
+    Values of each row of a dataset of the result store - c.f. hdf5_rows.
+    """
+    if h5py.check_string_dtype(dataset.dtype) is not None:
+        return [json.loads(value) for value in dataset.asstr()[...]]
+
+    return dataset[...].tolist()
+
+
+def hdf5_kind(dataset):
+    """
+    Kind of a dataset of the HDF5 file, c.f. HDF5_KINDS.
+    """
+    if h5py.check_string_dtype(dataset.dtype) is not None:
+        return 'text'
+
+    return {'b': 'bool', 'i': 'int', 'f': 'float'}[dataset.dtype.kind]
+
+
+def hdf5_write_column(store, col, values, rows):
+    """
+    Append the values of the new rows to a column of the HDF5 file.
+
+    The kind of the column is widened if needed - bool, int, float then json text - and the
+    dataset is then rewritten, so a value is never truncated. The missing values, of the new
+    rows and of the rows written before the column existed, are NaN for the numeric scalars and
+    null otherwise.
+
+    Parameter
+    ---------
+    store: h5py.File
+        the HDF5 file
+    col: str
+        the column, e.g. SNPs or Parameters/Tau
+    values: list
+        the value of each new row, None if it's missing
+    rows: int
+        the number of rows already in the store
+    """
+    # Rows written before the column existed & new rows
+    start = store[col].shape[0] if col in store else 0
+    values = [None] * (rows - start) + values
+
+    kinds = [hdf5_column(value) for value in values if value is not None]
+    if col in store:
+        kinds.append((hdf5_kind(store[col]), store[col].shape[1:]))
+    missing = any(value is None for value in values)
+
+    shapes = {shape for kind, shape in kinds if kind != 'text'}
+    kind = max((kind for kind, _ in kinds), key=HDF5_KINDS.index)
+    if kind == 'text' or len(shapes) > 1 or (missing and shapes != {()}):
+        kind, shape = 'text', ()
+    else:
+        shape = shapes.pop()
+        if missing:
+            kind = max(kind, 'float', key=HDF5_KINDS.index)
+
+    # Rewrite the dataset if its kind or its shape changes
+    if col in store and (hdf5_kind(store[col]), store[col].shape[1:]) != (kind, shape):
+        values = read_hdf5_column(store[col]) + values
+        start = 0
+        del store[col]
+
+    if col not in store:
+        dtype = h5py.string_dtype() if kind == 'text' else HDF5_DTYPES[kind]
+        store.create_dataset(
+            col, shape=(0,) + shape, maxshape=(None,) + shape, dtype=dtype, chunks=True,
+            compression='gzip'
+        )
+
+    # One resize and one write of the rows
+    dataset = store[col]
+    dataset.resize(start + len(values), axis=0)
+    dataset[start:] = hdf5_rows(values, kind, shape)
+
+
+def hdf5_append(fichier, data):
+    """
+    Append the rows of a DataFrame to the HDF5 file of a result store.
+
+    Each column is a resizable dataset whose first axis is the row - the rows of data are
+    appended at once to each dataset, so the file is never rewritten unless the kind of a column
+    is widened, c.f. hdf5_write_column. The columns and the keys of the dictionaries missing
+    from some rows are padded, so every dataset has one value per row.
+
+    Parameter
+    ---------
+    fichier: str
+        the HDF5 file, created if it doesn't exist
+    data: pandas DataFrame
+        the rows to append
+    """
+    with h5py.File(fichier, 'a') as store:
+        datasets = []
+        store.visititems(
+            lambda name, obj: datasets.append(name) if isinstance(obj, h5py.Dataset) else None
+        )
+        rows = store.attrs.get('rows', max([store[col].shape[0] for col in datasets] + [0]))
+
+        # Columns of dictionaries, split in one dataset per key
+        groups = {col for col in store if isinstance(store[col], h5py.Group)}
+        groups.update(
+            col for col in data.columns if any(isinstance(value, dict) for value in data[col])
+        )
+
+        records = [flatten_record(record, groups) for record in data.to_dict(orient='records')]
+        for record in records:
+            datasets += [col for col in record if col not in datasets]
+
+        # NaN of the concatenation of DataFrames - missing value
+        for col in datasets:
+            values = [record.get(col) for record in records]
+            values = [
+                None if isinstance(value, float) and np.isnan(value) else value
+                for value in values
+            ]
+            hdf5_write_column(store, col, values, rows)
+
+        columns = json.loads(store.attrs.get('columns', '[]'))
+        store.attrs['columns'] = json.dumps(
+            columns + [col for col in data.columns if col not in columns]
+        )
+        store.attrs['rows'] = rows + len(records)
+
+    return fichier
+
+
+def hdf5_load(fichier, columns=None):
+    """
+    Load the result store of a HDF5 file into a DataFrame.
+
+    Parameter
+    ---------
+    fichier: str
+        the HDF5 file
+    columns: list
+        the columns to load - if None all of them - only these datasets are read
+
+    Return
+    ------
+    data: pandas DataFrame
+        one row per cell, the arrays as lists and the dictionaries rebuilt as when the results
+        are loaded from json
+    """
+    with h5py.File(fichier, 'r') as store:
+        columns = json.loads(store.attrs['columns']) if columns is None else columns
+        rows = store.attrs['rows']
+
+        data = {}
+        for col in columns:
+            if col not in store:
+                continue
+
+            if isinstance(store[col], h5py.Group):
+                keys = {key: read_hdf5_column(store[col][key]) for key in store[col]}
+                data[col] = [
+                    {key: values[row] for key, values in keys.items()} for row in range(rows)
+                ]
+            else:
+                data[col] = read_hdf5_column(store[col])
+
+    return pd.DataFrame(data, columns=[col for col in columns if col in data])
+
+
+def json_append(fichier, data):
+    """
+    Append the rows of a DataFrame to a zipped json file - the former storage of the results.
+    """
+    if os.path.isfile("{}.zip".format(fichier)):
+        data = pd.concat([json_load(fichier), data], ignore_index=True)
+        os.remove("{}.zip".format(fichier))
+
+    data.to_json(fichier)
+    zip_file(fichier)
+
+    return fichier
+
+
+def json_load(fichier, columns=None):
+    """
+    Load a zipped json file of results into a DataFrame.
+    """
+    data = pd.read_json(path_or_buf="{}.zip".format(fichier), typ='frame')
+
+    return data if columns is None else data[[col for col in columns if col in data]]
+
+
+def frame_digest(data):
+    """
+    SHA-256 of the content of a DataFrame - not of its file, as a zip archive also records
+    the time it was written.
+    """
+    return hashlib.sha256(data.to_json().encode()).hexdigest()
+
+
+def aggregate_files(path_data, fichiers, store):
+    """
+    Aggregate the per-job json files into the HDF5 result store, incrementally.
+
+    The files are read one after another and concatenated at once, then appended to a copy of
+    the store which replaces the store atomically - so a crash leaves the store and the files
+    as they were. The digest of each file is recorded in the store, under its name, so a file
+    already aggregated is never appended twice, while a job run again - a new file with the
+    same name - is appended. The files are deleted only once the store is written, either the
+    ones appended or the ones whose content is already in the store.
+
+    Parameter
+    ---------
+    path_data: str
+        the directory of the files
+    fichiers: list
+        the names of the per-job files - the new jobs since the last aggregation
+    store: str
+        the HDF5 file of the result store, created if it doesn't exist
+    """
+    sources = {}
+    if os.path.isfile(store):
+        with h5py.File(store, 'r') as filin:
+            sources = json.loads(filin.attrs.get('sources', '{}'))
+        if isinstance(sources, list):
+            # Names only, from the former stores - their content is unknown
+            sources = {fichier: [] for fichier in sources}
+
+    # Files with a content not yet in the store & files already aggregated
+    frames = {
+        fichier: pd.read_json("{}{}".format(path_data, fichier), typ='frame')
+        for fichier in fichiers
+    }
+    digests = {fichier: frame_digest(data) for fichier, data in frames.items()}
+    aggregated = [
+        fichier for fichier, digest in digests.items() if digest in sources.get(fichier, [])
+    ]
+    fichiers = [fichier for fichier in fichiers if fichier not in aggregated]
+
+    if fichiers:
+        data = pd.concat([frames[fichier] for fichier in fichiers], ignore_index=True)
+
+        # Append to a copy of the store, then replace the store
+        tmp = "{}-tmp{}".format(*os.path.splitext(store))
+        if os.path.isfile(tmp):
+            os.remove(tmp)  # Left by a crash
+        if os.path.isfile(store):
+            shutil.copyfile(store, tmp)
+
+        hdf5_append(tmp, data)
+        for fichier in fichiers:
+            sources[fichier] = sources.get(fichier, []) + [digests[fichier]]
+        with h5py.File(tmp, 'a') as filout:
+            filout.attrs['sources'] = json.dumps(sources)
+
+        os.replace(tmp, store)
+        evict_cache(store)
+
+    # Delete the json files appended now or before a crash
+    for fichier in fichiers + aggregated:
+        os.remove("{}{}".format(path_data, fichier))
+
+    return store
+
+
+# Backends of the result store - HDF5 for the .h5 files, zipped json for the others
+STORES = {
+    'hdf5': {'Append': hdf5_append, 'Load': hdf5_load},
+    'json': {'Append': json_append, 'Load': json_load}
+}
+
+
+def result_store(fichier):
+    """
+    Backend of the result store of a file, c.f. STORES.
+    """
+    return STORES['hdf5' if fichier.endswith('.h5') else 'json']
+
+
+def store_append(fichier, data):
+    """
+    Append the rows of a DataFrame to the result store of fichier.
+    """
+    return result_store(fichier)['Append'](fichier, data)
+
+
+def store_load(fichier, columns=None):
+    """
+    Load the result store of fichier, only the columns if given (column projection).
+    """
+    return result_store(fichier)['Load'](fichier, columns)
+
+
+# Result stores already loaded, for each file and columns its modification time and its data
+_RESULTS = {}
+
+
+def evict_cache(source, mtime_ns=None):
+    """
+    Delete the pickles of a result store in the directory .cache/ next to it - c.f.
+    cached_load - but the ones of the modification time mtime_ns if given, so only the
+    pickles of the current version of the store are kept.
+
+    Parameter
+    ---------
+    source: str
+        the file of the result store
+    mtime_ns: int
+        the modification time of the store in nanoseconds, its pickles are kept - if None all
+        the pickles of the store are deleted
+    """
+    path_cache = os.path.join(os.path.dirname(source), ".cache")
+    if not os.path.isdir(path_cache):
+        return
+
+    for fil in os.listdir(path_cache):
+        # Pickles named store-mtime-digest.pkl - not the ones being written
+        name = fil.rsplit('-', 2)
+        if (fil.endswith('.pkl') and len(name) == 3 and name[0] == os.path.basename(source)
+                and name[1] != str(mtime_ns)):
+            try:
+                os.remove(os.path.join(path_cache, fil))
+            except FileNotFoundError:
+                pass  # Deleted by another job
+
+
+def cached_load(fichier, columns=None):
+    """
+    Read-only load of a result store, cached in-process and on disk.
+
+    The cache is keyed by the file, its modification time and the columns, so a store updated
+    by an export is loaded again. On disk, the DataFrame is pickled in the directory .cache/
+    next to the store - the store itself is never written. Only the pickles of the current
+    version of the store are kept, c.f. evict_cache.
+
+    Parameter
+    ---------
+    fichier: str
+        the result store, c.f. store_load
+    columns: list
+        the columns to load - if None all of them
+
+    Return
+    ------
+    data: pandas DataFrame
+        a copy of the cached DataFrame
+    """
+    source = fichier if result_store(fichier) is STORES['hdf5'] else "{}.zip".format(fichier)
+    mtime = os.stat(source).st_mtime_ns
+    key = (fichier, None if columns is None else tuple(columns))
+
+    if key not in _RESULTS or _RESULTS[key][0] != mtime:
+        path_cache = os.path.join(os.path.dirname(source), ".cache")
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        cache = os.path.join(
+            path_cache, "{}-{}-{}.pkl".format(os.path.basename(source), mtime, digest)
+        )
+
+        try:
+            data = pd.read_pickle(cache)
+        except FileNotFoundError:
+            data = store_load(fichier, columns)
+
+            # Pickle to a temporary file, then rename - several jobs may load the same store
+            os.makedirs(path_cache, exist_ok=True)
+            tmp = "{}.{}".format(cache, os.getpid())
+            data.to_pickle(tmp)
+            os.replace(tmp, cache)
+
+            # Pickles of the former versions of the store
+            evict_cache(source, mtime)
+
+        _RESULTS[key] = (mtime, data)
+
+    return _RESULTS[key][1].copy()
+
+
 ######################################################################
 # Export json files                                                  #
 ######################################################################
@@ -346,28 +896,176 @@ def extract_param(fichier):
     }
 
 
-def export_simulation_files(typ, job, path_data, param=None, value=None):
+def update_simulation_manifest(connection, path_data):
     """
-    Export each json file generated with msprime into a single DataFrame.
-    Then export this DataFrame to a json file.
+    Update the manifest with the simulation files of path_data - c.f. simulation_manifest.
+
+    The files deleted or renamed since the last update are removed from the manifest, and the
+    files modified since - e.g. generated again - are read again. Each new file is read once to
+    record its number of replicates and its mean number of SNPs. Then the jobs are numbered
+    again, in the order of the file names.
+    """
+    current = {
+        fil: os.path.getmtime("{}{}".format(path_data, fil)) for fil in os.listdir(path_data)
+        if fil.endswith('.zip') and fil.startswith(('SFS', 'VCF'))
+    }
+    known = dict(connection.execute("SELECT fichier, mtime FROM simulations"))
+
+    # Files deleted, renamed or modified since the last update
+    stale = [(fichier,) for fichier, mtime in known.items() if current.get(fichier) != mtime]
+    connection.executemany("DELETE FROM simulations WHERE fichier = ?", stale)
+    connection.executemany("DELETE FROM parameters WHERE fichier = ?", stale)
+
+    fichiers = sorted(fil for fil, mtime in current.items() if known.get(fil) != mtime)
+    for fichier in fichiers:
+        snp = pd.read_json("{}{}".format(path_data, fichier))['SNPs'].iloc[0]
+        connection.execute(
+            "INSERT INTO simulations VALUES (?, ?, NULL, ?, ?, ?)",
+            (fichier, fichier[:3], len(snp) if isinstance(snp, list) else 1,
+             float(np.mean(snp)), current[fichier])
+        )
+        connection.executemany(
+            "INSERT INTO parameters VALUES (?, ?, ?, NULL, ?)",
+            [(fichier[:3], param, value, fichier)
+             for param, value in extract_param(fichier).items()]
+        )
+
+    # Number the jobs of each type, and of each type & value of a parameter, from 0
+    rows = connection.execute("SELECT typ, fichier FROM simulations ORDER BY typ, fichier")
+    jobs, counts = [], {}
+    for typ, fichier in rows.fetchall():
+        counts[typ] = counts.get(typ, -1) + 1
+        jobs.append((counts[typ], fichier))
+    connection.executemany("UPDATE simulations SET job = ? WHERE fichier = ?", jobs)
+
+    rows = connection.execute(
+        "SELECT typ, param, value, fichier FROM parameters ORDER BY typ, param, value, fichier"
+    )
+    jobs, counts = [], {}
+    for typ, param, value, fichier in rows.fetchall():
+        counts[(typ, param, value)] = counts.get((typ, param, value), -1) + 1
+        jobs.append((counts[(typ, param, value)], param, fichier))
+    connection.executemany(
+        "UPDATE parameters SET job = ? WHERE param = ? AND fichier = ?", jobs
+    )
+
+
+def simulation_manifest(path_data):
+    """
+    Manifest of the simulation files of a directory, built once and updated with its changes.
+
+    The manifest is a SQLite database next to the directory - e.g. ./Data/Msprime/decline/
+    gives ./Data/Msprime/decline.manifest.sqlite. For each file it records the type (SFS or
+    VCF), the job, the parameters, the number of replicates, the mean number of SNPs and its
+    modification time.
+
+    The job of a file is its index among the files of the same type sorted by name, so a job
+    is the same cell of parameters on every node whatever the order of os.listdir. It's only
+    updated when the directory has changed since the last update (modification time).
+
+    Parameter
+    ---------
+    path_data: str
+        the directory of the simulation files
+
+    Return
+    ------
+    connection: sqlite3.Connection
+        the connection to the manifest
+    """
+    manifest = "{}.manifest.sqlite".format(path_data.rstrip('/'))
+    # Transactions are handled explicitly - isolation_level None
+    connection = sqlite3.connect(manifest, timeout=60, isolation_level=None)
+
+    # Manifest without the modification time of the files - built again from the files
+    columns = [col for _, col, *_ in connection.execute("PRAGMA table_info(simulations)")]
+    if columns and 'mtime' not in columns:
+        connection.executescript("""
+            DROP TABLE IF EXISTS simulations;
+            DROP TABLE IF EXISTS parameters;
+            DROP TABLE IF EXISTS directory;
+        """)
+
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS simulations (
+            fichier TEXT PRIMARY KEY, typ TEXT, job INTEGER, replicates INTEGER,
+            snp REAL, mtime REAL
+        );
+        CREATE INDEX IF NOT EXISTS simulations_job ON simulations (typ, job);
+        CREATE TABLE IF NOT EXISTS parameters (
+            typ TEXT, param TEXT, value REAL, job INTEGER, fichier TEXT,
+            PRIMARY KEY (param, fichier)
+        );
+        CREATE INDEX IF NOT EXISTS parameters_job ON parameters (typ, param, value, job);
+        CREATE TABLE IF NOT EXISTS directory (mtime REAL);
+    """)
+
+    # The check of the directory and the update are done under the write lock, so the jobs of
+    # an array started at once wait for the first one to update the manifest
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        mtime = os.path.getmtime(path_data)
+        if connection.execute("SELECT mtime FROM directory").fetchone() != (mtime,):
+            update_simulation_manifest(connection, path_data)
+            connection.execute("DELETE FROM directory")
+            connection.execute("INSERT INTO directory VALUES (?)", (mtime,))
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+    return connection
+
+
+def simulation_file(typ, job, path_data, param=None, value=None):
+    """
+    Name of the simulation file of a job - c.f. simulation_manifest.
 
     Parameters
     ----------
     typ: either SFS or VCF
-    job
-    param
+    job: the job, from 0
+    path_data: the directory of the simulation files
+    param: if not None, the job is among the files with the value of param
     value
     """
-    fichiers = [filin for filin in os.listdir(path_data) if filin.startswith(typ.upper())]
+    connection = simulation_manifest(path_data)
 
-    # Selection of the file
-    if param is not None:
-        fichiers = [
-            fil for fil in os.listdir(path_data) if extract_param(fil)[param] == value
-        ]
+    if param is None:
+        row = connection.execute(
+            "SELECT fichier FROM simulations WHERE typ = ? AND job = ?", (typ.upper(), job)
+        ).fetchone()
+    else:
+        row = connection.execute(
+            "SELECT fichier FROM parameters WHERE typ = ? AND param = ? AND value = ? "
+            "AND job = ?", (typ.upper(), param, value, job)
+        ).fetchone()
+    connection.close()
+
+    if row is None:
+        sys.exit("Error \"simulation_file\": no {} file for the job {} in {}"
+                 .format(typ.upper(), job, path_data))
+
+    return row[0]
+
+
+def export_simulation_files(typ, job, path_data, param=None, value=None):
+    """
+    Export the json file generated with msprime of a job into a DataFrame.
+
+    Parameters
+    ----------
+    typ: either SFS or VCF
+    job: the job, from 0 - c.f. simulation_manifest
+    param: if not None, the job is among the files with the value of param
+    value
+    """
+    fichier = simulation_file(typ, job, path_data, param, value)
 
     # Load Data
-    simulation = pd.read_json("{}{}".format(path_data, fichiers[job]))
+    simulation = pd.read_json("{}{}".format(path_data, fichier))
+    if 'Trees' in simulation:
+        simulation['Trees'] = simulation['Trees'].apply(trees_archive, path_data=path_data)
     
     if typ == 'SFS':
         return simulation[['Parameters', 'SFS observed', 'SNPs', 'Time']].iloc[0]
@@ -375,10 +1073,9 @@ def export_simulation_files(typ, job, path_data, param=None, value=None):
     return simulation.iloc[0]
 
 
-def export_inference_files(model, fold, param, value=None):
+def inference_store(model, fold, param, value=None):
     """
-    Export each json file generated with dadi into a single DataFrame.
-    Then export this DataFrame to a json file.
+    Directory and name of the result store of dadi inferences.
 
     Parameter
     ---------
@@ -386,14 +1083,14 @@ def export_inference_files(model, fold, param, value=None):
     param: either all, tau, kappa or ne
     value: not None if param is tau or kappa, it's the value of the fixed parameters for the
     inference
-    """
-    # Data
-    col = ['Parameters', 'Positive hit', 'SNPs', 'SFS observed', 'M0', 'M1', 'Time',
-           'd2 observed inferred', 'd2 models']
-    inference = pd.DataFrame(columns=col)
-    inference['Positive hit'] = inference['Positive hit'].astype(int)
 
-    # Path data and filin
+    Return
+    ------
+    path_data: str
+        the directory of the per-job files and of the store
+    filin: str
+        the name of the store, without extension
+    """
     path_data = "./Data/Dadi/{}/{}/".format(model, param)
     path_data += "Folded/" if fold else "Unfolded/"
     if param == 'all':
@@ -401,36 +1098,84 @@ def export_inference_files(model, fold, param, value=None):
     else:
         filin = "dadi_{}={}_all".format(model, value)
 
-    # Read file
-    if "{}.zip".format(filin) not in os.listdir(path_data):
+    return path_data, filin
 
-        fichiers = os.listdir(path_data)
 
-        # Select estimation for the specific value of param that is either tau, kappa or m12
-        if param != 'all':
-            fichiers = [
-                fichier for fichier in fichiers
-                if not fichier.endswith('all.zip')
-                and float(fichier.rsplit('-', maxsplit=1)[0].split('=')[1]) == value
-            ]
+def load_inference_files(model, fold, param, value=None, columns=None):
+    """
+    Load the exported dadi inferences, read-only - c.f. export_inference_files & cached_load.
 
-        for fichier in fichiers:
-            res = pd.read_json(path_or_buf="{}{}".format(path_data, fichier), typ='frame')
-            inference = inference.append(res, ignore_index=True)
+    The per-job files are not aggregated and the store is never written, so notebooks and jobs
+    can load it concurrently and repeated loads are instant.
 
-            # Delete the json file
-            os.remove("{}{}".format(path_data, fichier))
+    Parameter
+    ---------
+    model, fold, param, value
+        c.f. inference_store
+    columns: list
+        the columns to load - if None all of them
 
-        # Export pandas DataFrame inference to json file
-        inference.to_json("{}{}".format(path_data, filin))
+    Return
+    ------
+    inference: pandas DataFrame
+        one row per cell of the grid
+    """
+    path_data, filin = inference_store(model, fold, param, value)
 
-    else:
-        inference = pd.read_json(path_or_buf="{}{}.zip".format(path_data, filin), typ='frame')
+    # Results of a former export, stored as zipped json
+    if os.path.isfile("{}{}.zip".format(path_data, filin)):
+        return cached_load("{}{}".format(path_data, filin), columns)
+
+    if not os.path.isfile("{}{}.h5".format(path_data, filin)):
+        sys.exit("Error \"load_inference_files\": no export of the inferences in {}, c.f. "
+                 "export_inference_files".format(path_data))
+
+    return cached_load("{}{}.h5".format(path_data, filin), columns)
+
+
+def export_inference_files(model, fold, param, value=None, columns=None):
+    """
+    Export each json file generated with dadi into a single result store - c.f. store_append.
+
+    Parameter
+    ---------
+    model: either cst, decline or migration
+    param: either all, tau, kappa or ne
+    value: not None if param is tau or kappa, it's the value of the fixed parameters for the
+    inference
+    columns: list
+        the columns to load, e.g. ['Parameters', 'Positive hit'] - if None all of them
 
-    # Zip file
-    zip_file("{}{}".format(path_data, filin))
+    Return
+    ------
+    inference: pandas DataFrame
+        one row per cell of the grid
+    """
+    # Path data and filin
+    path_data, filin = inference_store(model, fold, param, value)
+
+    # Results of a former export, stored as zipped json
+    if "{}.zip".format(filin) in os.listdir(path_data):
+        return store_load("{}{}".format(path_data, filin), columns)
+
+    # Jobs ended since the last export - not the store nor its cache
+    fichiers = [
+        fichier for fichier in os.listdir(path_data)
+        if not fichier.endswith(('all.zip', '.h5')) and not fichier.startswith('.')
+    ]
+
+    # Select estimation for the specific value of param that is either tau, kappa or m12
+    if param != 'all':
+        fichiers = [
+            fichier for fichier in fichiers
+            if float(fichier.rsplit('-', maxsplit=1)[0].split('=')[1]) == value
+        ]
+
+    store = aggregate_files(path_data, fichiers, "{}{}.h5".format(path_data, filin))
+    if not os.path.isfile(store):
+        return pd.DataFrame(columns=columns)
 
-    return inference
+    return store_load(store, columns)
 
 
 def export_specific_dadi_inference(model, fixed_param, values, fold):
@@ -461,7 +1206,14 @@ def export_specific_dadi_inference(model, fixed_param, values, fold):
     data, labels = [], []
 
     for val in values:
-        data.append(export_inference_files(model, fold, fixed_param, val))
+        path_data, filin = inference_store(model, fold, fixed_param, val)
+
+        # First export of the per-job files, then read-only loads
+        if not any(os.path.isfile("{}{}{}".format(path_data, filin, ext))
+                   for ext in ['.h5', '.zip']):
+            export_inference_files(model, fold, fixed_param, val)
+
+        data.append(load_inference_files(model, fold, fixed_param, val))
         labels.append("{} = {:.1e}".format(
             fixed_param if fixed_param == "m12" else fixed_param.capitalize(),
             np.power(10, val))
@@ -472,10 +1224,10 @@ def export_specific_dadi_inference(model, fixed_param, values, fold):
 
 # Stairway files
 
-def export_stairway_files(model, fold):
+def export_stairway_files(model, fold, columns=None):
     """
-    Export each file generated from the inference with stairway into a single DataFraùe.
-    Then export this DataFrame to a json file.
+    Export each file generated from the inference with stairway into a single result store -
+    c.f. store_append.
 
     Parameter
     ---------
@@ -483,6 +1235,8 @@ def export_stairway_files(model, fold):
     fold: boolean
       - True: inference with folded SFS
       - False: inference with unfolded SFS
+    columns: list
+        the columns to load - if None all of them
     """
     # Path data and filin
     path_data = "./Data/Stairway/{}/".format(model)
@@ -490,31 +1244,74 @@ def export_stairway_files(model, fold):
 
     filin = "stairway_inference_{}".format(model)
 
-    if "{}.zip".format(filin) not in os.listdir(path_data):
-        # Data
-        inference = pd.DataFrame()
+    # Results of a former export, stored as zipped json
+    if "{}.zip".format(filin) in os.listdir(path_data):
+        return store_load("{}{}".format(path_data, filin), columns)
 
-        # Read all files
-        fichiers = os.listdir(path_data)
-        for fil in fichiers:
-            # Read the file
-            res = pd.read_json("{}{}".format(path_data, fil), typ='frame')
-            inference = inference.append(res, ignore_index=True)
+    # Inferences ended since the last export
+    fichiers = [
+        fil for fil in os.listdir(path_data) if not fil.endswith('.h5') and not fil.startswith('.')
+    ]
+    store = aggregate_files(path_data, fichiers, "{}{}.h5".format(path_data, filin))
+    if not os.path.isfile(store):
+        return pd.DataFrame(columns=columns)
 
-            # Delete the file
-            os.remove("{}{}".format(path_data, fil))
+    return store_load(store, columns)
 
-        # Export pandas DataFrame to json file
-        inference.to_json("{}{}".format(path_data, filin))
 
-        # Zip
-        os.system('zip -j {0}{1}.zip {0}{1}'.format(path_data, filin))
-        os.remove("{}{}".format(path_data, filin))
+######################################################################
+# Tree sequence archive                                              #
+######################################################################
 
-    else:
-        inference = pd.read_json("{}{}.zip".format(path_data, filin), typ='frame')
+def save_trees(tree_seq, fichier):
+    """
+    Archive a tree sequence generated with msprime, compressed with gzip.
+
+    The tree sequence is the whole simulation in the binary format of tskit, far smaller and
+    faster to load than its variants in json.
+
+    Parameter
+    ---------
+    tree_seq: tskit.TreeSequence
+        the tree sequence with mutations
+    fichier: str
+        the archive, e.g. VCF_decline_tau=0.0_kappa=1.0.trees.gz
+
+    Return
+    ------
+    fichier: str
+        the archive
+    """
+    with tempfile.NamedTemporaryFile(suffix='.trees') as filin:
+        tree_seq.dump(filin.name)
+
+        with open(filin.name, 'rb') as trees, gzip.open(fichier, 'wb') as filout:
+            shutil.copyfileobj(trees, filout)
+
+    return fichier
+
+
+def trees_archive(fichier, path_data):
+    """
+    Path of a tree sequence archive, recorded by its name in the simulation file next to it in
+    path_data - c.f. save_trees. None if the simulation has no archive.
+    """
+    if not isinstance(fichier, str):
+        return None
+
+    return os.path.join(path_data, os.path.basename(fichier))
+
+
+def load_trees(fichier):
+    """
+    Load a tree sequence archived with save_trees.
+    """
+    with tempfile.NamedTemporaryFile(suffix='.trees') as filout:
+        with gzip.open(fichier, 'rb') as filin:
+            shutil.copyfileobj(filin, filout)
+        filout.flush()
 
-    return inference
+        return tskit.load(filout.name)
 
 
 ######################################################################
@@ -2,14 +2,19 @@
 This module allows the inference of demographic history of population with dadi.
 """
 
+import atexit
+import functools
+import os
 import sys
+import time
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 
 import numpy as np
+from scipy.optimize import fmin
+from scipy.special import gammaln
 import dadi
 
-FIXED = None
-VALUE = None
-
 
 def constant_model(ns, pts):
     """
@@ -36,7 +41,153 @@ def constant_model(ns, pts):
     return sfs
 
 
-def params_model(params):
+def observed_spectrum(sfs_observed, fold):
+    """
+    Create the dadi Spectrum of an observed SFS in memory.
+
+    Same pre-processing as files.dadi_data - adding 0/n & n/n, folding and masking of the 0
+    entries - but the Spectrum is built directly, without writing and parsing a .fs file.
+
+    Parameter
+    ---------
+    sfs_observed: list or numpy array
+        the original SFS - without corners 0/n & n/n
+    fold: bool
+        if the SFS must be fold (True) or not (False)
+
+    Return
+    ------
+    spectrum: dadi.Spectrum
+        the masked spectrum of the observed SFS
+    """
+    sfs = [0] + list(sfs_observed) + [0]  # Add 0/n & n/n to the sfs (lower and upper bound)
+    if fold:
+        sfs = sfs[:round(len(sfs)/2) + 1] + [0] * int(np.floor(len(sfs)/2))  # SFS folded
+
+    data = np.array(sfs, dtype=float)
+
+    # Mask value equal to 0
+    return dadi.Spectrum(data, mask=(data == 0), data_folded=fold)
+
+
+def observed_replicates(sfs_observed, fold):
+    """
+    Pre-processing of several observed SFS at once - adding 0/n & n/n and folding.
+
+    Same pre-processing as observed_spectrum, but for a 2-D array with one replicate per row.
+    The 0 entries are not masked here, c.f. batch_scoring.
+
+    Parameter
+    ---------
+    sfs_observed: list or numpy array
+        the replicates of the observed SFS - without corners 0/n & n/n
+    fold: bool
+        if the SFS must be fold (True) or not (False)
+
+    Return
+    ------
+    data: numpy array
+        replicates * (n+1) array of the SFS with corners 0/n & n/n
+    """
+    data = np.array(sfs_observed, dtype=float, ndmin=2)
+    data = np.pad(data, ((0, 0), (1, 1)))  # Add 0/n & n/n to each sfs
+
+    if fold:
+        data[:, round(data.shape[1]/2) + 1:] = 0  # SFS folded
+
+    return data
+
+
+def fold_spectra(spectra):
+    """
+    Fold several spectra at once - in the same way as dadi.Spectrum.fold.
+
+    Parameter
+    ---------
+    spectra: numpy array
+        ... * (n+1) array of unfolded spectra, the masked entries set to 0
+
+    Return
+    ------
+    folded: numpy array
+        the folded spectra, with the entries above n/2 set to 0
+    """
+    n = spectra.shape[-1] - 1
+
+    folded = spectra + spectra[..., ::-1]
+    if n % 2 == 0:
+        folded[..., n // 2] = spectra[..., n // 2]
+    folded[..., n // 2 + 1:] = 0
+
+    return folded
+
+
+def multinomial_scores(expected, data):
+    """
+    Multinomial log-likelihood and optimal theta of observed SFS given expected spectra.
+
+    Same computation as dadi.Inference.ll_multinom & dadi.Inference.optimal_sfs_scaling, but
+    the last axis of expected & data are broadcast against each other - e.g. several replicates
+    for one model or one replicate for several models. The entries equal to 0 in the data - as
+    masked in observed_spectrum - or in the expected spectra are not used.
+
+    Parameter
+    ---------
+    expected: numpy array
+        ... * (n+1) array of the expected spectra, the masked entries set to 0
+    data: numpy array
+        ... * (n+1) array of the observed SFS, c.f. observed_replicates
+
+    Return
+    ------
+    ll_model: numpy array
+        the log-likelihood of each pair (expected, data)
+    theta: numpy array
+        the optimal value of theta of each pair (expected, data)
+    """
+    # Entries used, i.e. the intersection of the masks of the data and the model
+    valid = (data != 0) & (expected > 0)
+
+    # The optimal value of theta given the model
+    theta = np.sum(data * valid, axis=-1) / np.sum(expected * valid, axis=-1)
+
+    # Poisson log-likelihood of each entry given theta * model
+    scaled = np.where(valid, theta[..., np.newaxis] * expected, 1.)
+    ll_bins = -scaled + np.log(scaled) * data - gammaln(data + 1.)
+
+    return np.sum(ll_bins * valid, axis=-1), theta
+
+
+def batch_scoring(model, data, fold):
+    """
+    Multinomial log-likelihood and optimal theta of several observed SFS given one model.
+
+    All the replicates are scored in one numpy call, c.f. multinomial_scores.
+
+    Parameter
+    ---------
+    model: dadi.Spectrum
+        the model spectrum - fold with the data if needed
+    data: numpy array
+        replicates * (n+1) array of the observed SFS, c.f. observed_replicates
+    fold: bool
+        if the SFS are fold (True) or not (False)
+
+    Return
+    ------
+    ll_model: numpy array
+        the log-likelihood of each replicate
+    theta: numpy array
+        the optimal value of theta given the model for each replicate
+    """
+    expected = np.ma.filled(model, 0)
+    if fold and not model.folded:
+        expected = fold_spectra(expected)
+
+    return multinomial_scores(expected, data)
+
+
+def params_model(params, fixed=None, value=None):
     """
     Define parameters for the inference.
 
@@ -53,19 +204,61 @@ def params_model(params):
 
     In each case, there are two parameters but we can fixed one of this to 'help' dadi fot the
     inference.
+
+    Parameter
+    ---------
+    params: list
+        the parameters evaluated by dadi
+    fixed: str
+        the fixed parameter, either tau, kappa, m12 or None
+    value: float
+        the value of the fixed parameter
     """
-    global FIXED, VALUE
-    if FIXED == 'tau':  # Fixed param: (Tau), the length of time ago at which the event occured
-        return params, VALUE
-    elif FIXED == 'kappa':  # Fixed param: (Kappa), the decline force
-        return VALUE, params
-    elif FIXED == 'm12':  # Fixed param: (m12), the migration rate into 1 from 2
-        return params[0], VALUE
+    if fixed == 'tau':  # Fixed param: (Tau), the length of time ago at which the event occured
+        return params[0], value
+    elif fixed == 'kappa':  # Fixed param: (Kappa), the decline force
+        return value, params[0]
+    elif fixed == 'm12':  # Fixed param: (m12), the migration rate into 1 from 2
+        return params[0], value
     else:
         return params
 
 
-def sudden_decline_model(params, ns, pts):
+@functools.lru_cache(maxsize=None)
+def fixed_model(model_func, fixed=None, value=None):
+    """
+    Model function with one of its parameter fixed.
+
+    The fixed parameter and its value are carried by the returned function - and not by a
+    global state - so inferences with various fixed parameters can run in parallel in the same
+    process. The same function is returned for the same (model_func, fixed, value), so its
+    extrapolated version is also built once.
+
+    Parameter
+    ---------
+    model_func: function
+        the custom model_func - either sudden_decline_model or twopops_migration_model
+    fixed: str
+        the fixed parameter, either tau, kappa, m12 or None
+    value: float
+        the value of the fixed parameter
+
+    Return
+    ------
+    model: function
+        model function of signature (params, ns, pts) - with the name of model_func
+    """
+    if fixed is None:
+        return model_func
+
+    @functools.wraps(model_func)
+    def model(params, ns, pts):
+        return model_func(params, ns, pts, fixed=fixed, value=value)
+
+    return model
+
+
+def sudden_decline_model(params, ns, pts, fixed=None, value=None):
     """
     Sudden decline model of the population.
 
@@ -81,9 +274,11 @@ def sudden_decline_model(params, ns, pts):
         the number of sampled genomes in resulting spectrum
     pts: list
         the number of grid points to use in integration
+    fixed, value: str, float
+        the fixed parameter (either tau or kappa) and its value - c.f. params_model
     """
     # Params (Kappa, Tau)
-    kappa, tau = params_model(params)
+    kappa, tau = params_model(params, fixed, value)
 
     # Define the grid we'll use
     grid = dadi.Numerics.default_grid(pts)
@@ -100,7 +295,39 @@ def sudden_decline_model(params, ns, pts):
     return sfs
 
 
-def twopops_migration_model(params, ns, pts):
+@functools.lru_cache(maxsize=16)
+def ancestral_split(pts):
+    """
+    Grid and phi of the ancestral population at equilibrium split into two populations.
+
+    These stages of twopops_migration_model don't depend on its parameters, so they are computed
+    once per grid size and process. The returned phi is shared and must not be modified.
+
+    Parameter
+    ---------
+    pts: int
+        the number of grid points to use in integration
+
+    Return
+    ------
+    grid: numpy array
+        the grid
+    phi: numpy array
+        the phi of the two populations just after the split
+    """
+    # Define the grid we'll use
+    grid = dadi.Numerics.default_grid(pts)
+
+    # Define the phi_ancestral, i.e. phi for the equilibrium ancestral population
+    phi_ancestral = dadi.PhiManip.phi_1D(grid)
+
+    # Split the ancestral population into two population
+    phi = dadi.PhiManip.phi_1D_to_2D(grid, phi_ancestral)
+
+    return grid, phi
+
+
+def twopops_migration_model(params, ns, pts, fixed=None, value=None):
     """
     Two populations migration model.
 
@@ -119,27 +346,20 @@ def twopops_migration_model(params, ns, pts):
         the number of sampled genomes in resulting spectrum
     pts: list
         the number of grid points to use in integration
+    fixed, value: str, float
+        the fixed parameter (either kappa or m12) and its value - c.f. params_model
     """
     # Params: (kappa, m12) - with m21 = 0.0
-    kappa, m12 = params_model(params)
+    kappa, m12 = params_model(params, fixed, value)
     m21 = 0.0
     tau = 10.0  # time in the past of split
 
-    if FIXED == 'kappa':
-        m12 = m12[0]
-
-    # Define the grid we'll use
-    grid = dadi.Numerics.default_grid(pts)
-
-    # Define the phi_ancestral, i.e. phi for the equilibrium ancestral population
-    phi_ancestral = dadi.PhiManip.phi_1D(grid)
-
-    # Split the ancestral population into two population
-    phi = dadi.PhiManip.phi_1D_to_2D(grid, phi_ancestral)
-
-    # Define the sudden decline event at a time tau in past
+    # Grid & phi of the ancestral population split into two population - cached
+    grid, phi = ancestral_split(pts)
 
-    phi = dadi.Integration.two_pops(phi, grid, tau, nu1=1.0, nu2=1.0*kappa, m12=m12, m21=m21)
+    # Define the sudden decline event at a time tau in past - on a copy of the cached phi
+    phi = dadi.Integration.two_pops(phi.copy(), grid, tau, nu1=1.0, nu2=1.0*kappa, m12=m12,
+                                    m21=m21)
 
     # Remove population 2 from phi
     phi = dadi.PhiManip.remove_pop(phi, grid, 2)
@@ -150,8 +370,391 @@ def twopops_migration_model(params, ns, pts):
     return sfs
 
 
+def migration_model_stages(params, ns, pts):
+    """
+    Execution time of each stage of twopops_migration_model, without the cache of
+    ancestral_split - to profile where the time of the 2-D integration goes.
+
+    Parameter
+    ---------
+    params: list
+        the parameters (Kappa, m12)
+    ns: list
+        the number of sampled genomes in resulting spectrum
+    pts: int
+        the number of grid points to use in integration
+
+    Return
+    ------
+    stages: dictionary
+        execution time of the stages Grid, Equilibrium, Split, Integration, Remove & Spectrum
+    """
+    kappa, m12 = params
+    stages, start_time = {}, time.time()
+
+    def stage(name):
+        nonlocal start_time
+        stages[name] = time.time() - start_time
+        start_time = time.time()
+
+    grid = dadi.Numerics.default_grid(pts)
+    stage('Grid')
+    phi = dadi.PhiManip.phi_1D(grid)
+    stage('Equilibrium')
+    phi = dadi.PhiManip.phi_1D_to_2D(grid, phi)
+    stage('Split')
+    phi = dadi.Integration.two_pops(phi, grid, 10.0, nu1=1.0, nu2=1.0*kappa, m12=m12, m21=0.0)
+    stage('Integration')
+    phi = dadi.PhiManip.remove_pop(phi, grid, 2)
+    stage('Remove')
+    dadi.Spectrum.from_phi(phi, ns, (grid,))
+    stage('Spectrum')
+
+    return stages
+
+
+@functools.lru_cache(maxsize=None)
+def extrapolated_model(model_func):
+    """
+    Make the extrapolation version of a demographic model function.
+
+    It's done once per model function and process, so the same extrapolated function is reused
+    by every inference of a run.
+    """
+    return dadi.Numerics.make_extrap_log_func(model_func)
+
+
+def close_pool(pool):
+    """
+    Close a pool of grid_pool and wait for its workers - at the exit of the process.
+    """
+    pool.close()
+    pool.join()
+
+
+@functools.lru_cache(maxsize=None)
+def grid_pool(workers, backend):
+    """
+    Pool on which the grid sizes of the extrapolation are evaluated - one per process.
+
+    The pool is closed at the exit of the process.
+
+    Parameter
+    ---------
+    workers: int
+        the number of threads or processes
+    backend: str
+        either thread or process. A pool of processes can't be created by the processes of
+        another pool, e.g. the restarts of multi_start_inference.
+    """
+    pool = Pool(processes=workers) if backend == 'process' else ThreadPool(processes=workers)
+    atexit.register(close_pool, pool)
+
+    return pool
+
+
+def evaluate_model(evaluation):
+    """
+    Evaluation of a model function for one grid size - run by the workers of grid_pool.
+
+    Parameter
+    ---------
+    evaluation: tuple
+        (model_func, fixed, value, params, ns, pts)
+
+    Return
+    ------
+    data, mask: numpy array
+        the spectrum, as plain arrays to be sent back by a process
+    extrap_x: float
+        the x value of the grid size for the extrapolation, c.f. dadi.Spectrum.extrap_x
+    """
+    model_func, fixed, value, params, ns, pts = evaluation
+    sfs = fixed_model(model_func, fixed, value)(params, ns, pts)
+
+    return np.ma.getdata(sfs), np.ma.getmaskarray(sfs), sfs.extrap_x
+
+
+@functools.lru_cache(maxsize=None)
+def parallel_extrapolated_model(model_func, fixed=None, value=None, workers=3,
+                                backend='thread'):
+    """
+    Extrapolation version of a demographic model function - with the grid sizes evaluated
+    concurrently.
+
+    The spectra of the grid sizes are computed on grid_pool and then extrapolated by
+    dadi.Numerics.make_extrap_log_func itself, so the result is the same as with
+    extrapolated_model.
+
+    Parameter
+    ---------
+    model_func: function
+        the custom model_func - either sudden_decline_model or twopops_migration_model
+    fixed, value: str, float
+        the fixed parameter and its value
+    workers, backend
+        the pool of the evaluations, c.f. grid_pool
+
+    Return
+    ------
+    model: function
+        model function of signature (params, ns, pts_list) - with the name of model_func
+    """
+    @functools.wraps(model_func)
+    def model(params, ns, pts):
+        evaluations = grid_pool(workers, backend).map(
+            evaluate_model, [(model_func, fixed, value, list(params), ns, size) for size in pts]
+        )
+        spectra = {
+            size: dadi.Spectrum(data, mask=mask, extrap_x=extrap_x)
+            for size, (data, mask, extrap_x) in zip(pts, evaluations)
+        }
+
+        # Extrapolation of the spectra already computed
+        return dadi.Numerics.make_extrap_log_func(
+            lambda params, ns, pts: spectra[pts]
+        )(params, ns, pts)
+
+    return model
+
+
+def benchmark_extrapolation(model_func, params, ns, pts_list, repeats=10, workers=3,
+                            backend='thread'):
+    """
+    Benchmark of the evaluation of the grid sizes - serial versus concurrent.
+
+    Parameter
+    ---------
+    model_func: function
+        the custom model_func
+    params: list
+        the parameters of the model
+    ns: list
+        the number of sampled genomes in resulting spectrum
+    pts_list: list
+        the grid point use for extrapolation
+    repeats: int
+        the number of evaluations of each version
+    workers, backend
+        the pool of the concurrent version, c.f. grid_pool
+
+    Return
+    ------
+    benchmark: dictionary
+      - Serial & Parallel
+        Mean execution time of an evaluation of each version
+      - Speedup
+        Ratio of the two execution times
+      - Difference
+        Maximum absolute difference between the spectra of the two versions
+    """
+    versions = {
+        'Serial': extrapolated_model(model_func),
+        'Parallel': parallel_extrapolated_model(model_func, workers=workers, backend=backend)
+    }
+
+    benchmark, spectra = {}, {}
+    for key, function in versions.items():
+        function(params, ns, pts_list)  # Warm-up, e.g. start of the pool
+
+        start_time = time.time()
+        for _ in range(repeats):
+            spectra[key] = function(params, ns, pts_list)
+        benchmark[key] = (time.time() - start_time) / repeats
+
+    benchmark['Speedup'] = benchmark['Serial'] / benchmark['Parallel']
+    benchmark['Difference'] = float(np.max(np.abs(spectra['Serial'] - spectra['Parallel'])))
+
+    return benchmark
+
+
+def grid_benchmark(model_func, params_list, ns, candidates, reference, snp=1e4):
+    """
+    Accuracy and execution time of the extrapolation for various grid points.
+
+    The data is the spectrum of the model on the reference grid - scaled to snp SNPs - and the
+    error of a candidate is the largest difference, over params_list, between its
+    log-likelihood and the one of the reference.
+
+    Parameter
+    ---------
+    model_func: function
+        the custom model_func
+    params_list: list
+        the sets of parameters at which the model is evaluated
+    ns: list
+        the number of sampled genomes in resulting spectrum
+    candidates: list
+        the candidate pts_list
+    reference: list
+        the pts_list of the reference, finer than the candidates
+
+    Return
+    ------
+    benchmark: list
+        for each candidate, dictionary with keys pts_list, Time - the mean execution time of an
+        evaluation - and Error
+    """
+    model_func_extrapolated = extrapolated_model(model_func)
+
+    # Data - the reference spectrum for each set of parameters
+    data = []
+    for params in params_list:
+        expected = np.ma.filled(model_func_extrapolated(list(params), ns, reference), 0)
+        data.append(expected * snp / np.sum(expected[1:-1]))
+
+    data = np.array(data)
+    ll_reference, _ = multinomial_scores(data, data)
+
+    benchmark = []
+    for pts_list in candidates:
+        start_time = time.time()
+        expected = np.array([
+            np.ma.filled(model_func_extrapolated(list(params), ns, pts_list), 0)
+            for params in params_list
+        ])
+        execution = (time.time() - start_time) / len(params_list)
+
+        ll_candidate, _ = multinomial_scores(expected, data)
+
+        benchmark.append({
+            'pts_list': list(pts_list), 'Time': execution,
+            'Error': float(np.max(np.abs(ll_candidate - ll_reference)))
+        })
+
+    return benchmark
+
+
+@functools.lru_cache(maxsize=128)
+def cached_spectrum(model_func, params, ns, pts_list, fold):
+    """
+    Extrapolated model spectrum, memoized with a LRU cache of 128 spectra.
+
+    The spectrum of a model only depends on its parameters, the sample size and the grid
+    points, and not on the observed data. E.g. the constant model M0 is then integrated once
+    per sample size and grid instead of once per observed SFS.
+
+    Use model_spectrum to call it - the arguments must be hashable. The returned spectrum is
+    shared by every call with the same key and must not be modified.
+
+    Parameter
+    ---------
+    model_func: function
+        the model function - with its fixed parameter, c.f. fixed_model
+    params: tuple
+        the parameters of the model, None for the constant model
+    ns: tuple
+        the number of sampled genomes in resulting spectrum
+    pts_list: tuple
+        the grid point use for extrapolation
+    fold: bool
+        if the spectrum must be fold (True) or not (False)
+    """
+    # The folded spectrum is derived from the unfolded one, without a new integration
+    if fold:
+        return cached_spectrum(model_func, params, ns, pts_list, False).fold()
+
+    model_func_extrapolated = extrapolated_model(model_func)
+
+    if params is None:
+        return model_func_extrapolated(list(ns), list(pts_list))
+    return model_func_extrapolated(list(params), list(ns), list(pts_list))
+
+
+def model_spectrum(model_func, params, ns, pts_list, fold=False):
+    """
+    Extrapolated model spectrum, c.f. cached_spectrum.
+
+    Parameter
+    ---------
+    model_func: function
+        the model function
+    params: list
+        the parameters of the model, None for the constant model
+    ns: list
+        the number of sampled genomes in resulting spectrum
+    pts_list: list
+        the grid point use for extrapolation
+    fold: bool
+        if the spectrum must be fold (True) or not (False)
+    """
+    params = None if params is None else tuple(float(ele) for ele in params)
+    ns = tuple(int(ele) for ele in ns)
+
+    return cached_spectrum(model_func, params, ns, tuple(pts_list), fold)
+
+
+def optimizer_settings(method='log', maxiter=1, maxfun=None, tol=1e-5, grid_workers=1,
+                       grid_backend='thread'):
+    """
+    Settings of the optimizer of dadi.
+
+    Parameter
+    ---------
+    method: str
+        the optimizer, either log (BFGS - dadi.Inference.optimize_log), log_fmin (Nelder-Mead -
+        scipy.optimize.fmin on log(params), c.f. log_objective) or lbfgsb (L-BFGS-B -
+        dadi.Inference.optimize_log_lbfgsb)
+    maxiter: int
+        the maximum number of iterations
+    maxfun: int
+        the maximum number of evaluations of the model function - only for log_fmin
+    tol: float
+        the gradient tolerance for the convergence - gtol of log and pgtol of lbfgsb, not used
+        by log_fmin
+    grid_workers, grid_backend: int, str
+        the evaluation of the model function - if more than one worker, the grid sizes of the
+        extrapolation are evaluated concurrently, c.f. parallel_extrapolated_model
+
+    Return
+    ------
+    optimizer: dictionary
+        the settings, with keys Method, Maxiter, Maxfun, Tol, Grid workers & Grid backend
+    """
+    if method not in ['log', 'log_fmin', 'lbfgsb']:
+        sys.exit("Error \"optimizer_settings\": unknown optimizer {}".format(method))
+
+    return {
+        'Method': method, 'Maxiter': maxiter, 'Maxfun': maxfun, 'Tol': tol,
+        'Grid workers': grid_workers, 'Grid backend': grid_backend
+    }
+
+
+def log_objective(log_params, sfs, model_func, pts_list, lower_bound, upper_bound):
+    """
+    Objective of the optimization in log(params), as dadi.Inference.optimize_log_fmin.
+
+    Parameter
+    ---------
+    log_params: numpy.ndarray
+        the log of the parameters of the model
+    sfs: dadi.Spectrum
+        the observed SFS
+    model_func: function
+        the model function - extrapolated
+    pts_list: list
+        the grid point use for extrapolation
+    lower_bound, upper_bound: list
+        the bounds on the parameter values - None for no bound
+
+    Return
+    ------
+    The negative log-likelihood of the multinomial fit, 1e8 out of the bounds
+    """
+    params = np.exp(log_params)
+    for param, lower, upper in zip(params, lower_bound or [None] * len(params),
+                                   upper_bound or [None] * len(params)):
+        if (lower is not None and param < lower) or (upper is not None and param > upper):
+            return 1e8
+
+    model = model_func(params, sfs.sample_sizes, pts_list)
+    ll_model = dadi.Inference.ll_multinom(model, sfs)
+
+    return 1e8 if np.isnan(ll_model) else -ll_model
+
+
 def parameters_optimization(p0, sfs, model_func, pts_list, lower_bound, upper_bound,
-                            verbose=0):
+                            verbose=0, perturb=True, optimizer=None):
     """
     Parameters optimization.
 
@@ -175,30 +778,71 @@ def parameters_optimization(p0, sfs, model_func, pts_list, lower_bound, upper_bo
         Lower bound on parameter values. If not None, must be of same length as p0
     upper_bound: list
         Upper bound on parameter values. If not None, must be of same length as p0
+    perturb: bool
+        If True, perturb p0 before the optimization - if p0 comes from a space-filling design
+        it's already a random starting point
+    optimizer: dictionary
+        The settings of the optimizer, c.f. optimizer_settings - by default the BFGS method with
+        at most 1 iteration
 
     Return
     ------
     popt: list
-        Optimize log(params) to fit model to data using the BFGS method.
+        Optimize log(params) to fit model to data.
+    diagnostics: dictionary
+      - Evaluations
+        The number of evaluations of the model function
+      - Iterations
+        The number of iterations - None with the BFGS method, which doesn't report it
+      - Gradient
+        The norm of the gradient at popt - None with the Nelder-Mead method
+      - Converged
+        If the optimizer has converged (True) or stopped on its budget (False)
     """
+    if optimizer is None:
+        optimizer = optimizer_settings()
+
     # Perturb our parameters before optimization. This does so by taking each parameter a up
     # to a factor of two up or down.
-    p0 = dadi.Misc.perturb_params(p0, fold=1, upper_bound=upper_bound, lower_bound=lower_bound)
+    if perturb:
+        p0 = dadi.Misc.perturb_params(p0, fold=1, upper_bound=upper_bound,
+                                      lower_bound=lower_bound)
 
     # Do the optimization. By default we assume that theta is a free parameter, since it's
     # trivial to find given the other parameters. If you want to fix theta, add a
     # multinom=False to the call.
-    # The maxiter argument restricts how long the optimizer will run. For real runs, you will
-    # want to set this value higher (at least 10), to encourage better convergence. You will
-    # also want to run optimization several times using multiple sets of intial parameters, to
-    # be confident you've actually found the true maximum likelihood parameters.
+    # The budget of the optimizer - Maxiter, Maxfun & Tol - restricts how long it will run, so
+    # the accuracy of the inference is traded against its execution time.
 
     if verbose:
         print('Beginning optimization ************************************************')
 
-    popt = dadi.Inference.optimize_log(p0, sfs, model_func, pts_list,
-                                       lower_bound=lower_bound, upper_bound=upper_bound,
-                                       verbose=verbose, maxiter=1)
+    if optimizer['Method'] == 'log_fmin':
+        # dadi.Inference.optimize_log_fmin has no maxfun, so Nelder-Mead is run directly on
+        # the same objective - the log-parameters
+        log_popt, _, iterations, evaluations, warnflag = fmin(
+            log_objective, np.log(p0), args=(sfs, model_func, pts_list, lower_bound, upper_bound),
+            maxiter=optimizer['Maxiter'], maxfun=optimizer['Maxfun'], disp=verbose,
+            full_output=True
+        )
+        popt, gradient = np.exp(log_popt), None
+
+    elif optimizer['Method'] == 'lbfgsb':
+        popt, _, info = dadi.Inference.optimize_log_lbfgsb(
+            p0, sfs, model_func, pts_list, lower_bound=lower_bound, upper_bound=upper_bound,
+            verbose=verbose, maxiter=optimizer['Maxiter'], pgtol=optimizer['Tol'],
+            full_output=True
+        )
+        iterations, evaluations, warnflag = info['nit'], info['funcalls'], info['warnflag']
+        gradient = info['grad']
+
+    else:
+        popt, _, gradient, _, evaluations, _, warnflag = dadi.Inference.optimize_log(
+            p0, sfs, model_func, pts_list, lower_bound=lower_bound, upper_bound=upper_bound,
+            verbose=verbose, maxiter=optimizer['Maxiter'], gtol=optimizer['Tol'],
+            full_output=True
+        )
+        iterations = None
 
     if verbose:
         # The verbose argument controls how often progress of the optimizer should be
@@ -206,20 +850,350 @@ def parameters_optimization(p0, sfs, model_func, pts_list, lower_bound, upper_bo
         print('Finished optimization **************************************************')
         print('Best-fit parameters: {}'.format(popt))
 
-    return popt
+    diagnostics = {
+        'Evaluations': evaluations, 'Iterations': iterations,
+        'Gradient': None if gradient is None else float(np.linalg.norm(gradient)),
+        'Converged': warnflag == 0
+    }
 
+    return popt, diagnostics
 
-def inference(pts_list, model_func, fixed=None, value=None, verbose=0, path="./Data/",
-              name="SFS"):
+
+def parameters_bounds(fixed):
     """
-    Dadi inference.
+    Set up the initial guess and the bounds of the parameters evaluated by dadi.
+
+    Parameter
+    ---------
+    fixed: str
+        the fixed parameter, either tau, kappa, m12 or None
+
+    Return
+    ------
+    p0: list
+        initial guess for the parameters, which is somewhat arbitrary
+    lower_bound, upper_bound: list
+        lower & upper bound for the optimization
+    """
+    if fixed == 'tau':  # Fixed param: (Tau) & Param evaluates: (Kappa)
+        # Param: (Kappa)
+        return [1.0], [1e-4], [1e3]
+
+    if fixed == 'kappa':  # Fixed param: (Kappa) & Param evaluates: (Tau)
+        # Param: (Tau)
+        return [0.], [1e-4], [1e4]
+
+    if fixed == 'm12':  # Fixed param: (m12), the migration rate into 1 from 2
+        # Pram: (m12)
+        return [1.0], [1e-4], [1e3]
+
+    # Params evaluate: (Kappa, Tau) or (Kappa, m12)
+    return [1.0, 0.], [1e-4, 1e-4], [1e3, 1e4]
+
+
+def latin_hypercube(nb, lower_bound, upper_bound, seed=None):
+    """
+    Space-filling design of starting points for the optimization - latin hypercube sampling.
+
+    Each parameter range is divided in nb strata of equal size - in log10 scale since the
+    parameters span several orders of magnitude - and each stratum of each parameter is used
+    by exactly one point.
+
+    Parameter
+    ---------
+    nb: int
+        the number of starting points
+    lower_bound, upper_bound: list
+        lower & upper bound of the parameters
+    seed: int
+        the seed of the random generator
+
+    Return
+    ------
+    points: numpy array
+        nb * len(lower_bound) array of starting points
+    """
+    rng = np.random.default_rng(seed)
+    lower, upper = np.log10(lower_bound), np.log10(upper_bound)
+
+    # For each parameter, a random permutation of the strata and a random point in each one
+    strata = np.array([rng.permutation(nb) for _ in lower]).T
+    points = (strata + rng.random(strata.shape)) / nb
+
+    return np.power(10, lower + points * (upper - lower))
+
+
+def bank_lattice(nb=20):
+    """
+    Log-spaced lattice of the parameters (Kappa, Tau) or (Kappa, m12) of the expected-SFS bank.
+
+    Each parameter takes nb values, evenly spaced in log10 scale within the bounds of the
+    optimization, c.f. parameters_bounds.
+
+    Return
+    ------
+    lattice: numpy array
+        (nb*nb) * 2 array of parameters
+    """
+    _, lower_bound, upper_bound = parameters_bounds(None)
+
+    kappa, other = [
+        np.logspace(np.log10(lower), np.log10(upper), nb)
+        for lower, upper in zip(lower_bound, upper_bound)
+    ]
+
+    return np.array([[k, ele] for k in kappa for ele in other])
+
+
+def bank_file(model_func, ns, pts_list, path, nb=20):
+    """
+    File of the expected-SFS bank of a model - c.f. build_bank.
+
+    The name has the model, the sample size, the whole grid points and the size of the lattice,
+    e.g. bank_sudden_decline_model_n=20_pts=200-210-220_nb=20.npy
+    """
+    return "{}bank_{}_n={}_pts={}_nb={}.npy".format(
+        path, model_func.__name__, ns, "-".join(str(pts) for pts in pts_list), nb
+    )
+
+
+def bank_spectrum(point):
+    """
+    Extrapolated spectrum of a point of the lattice - run by the workers of build_bank.
+
+    Parameter
+    ---------
+    point: tuple
+        (model_func, ns, pts_list, params)
+
+    Return
+    ------
+    sfs: numpy array
+        the unfolded spectrum with the masked entries set to 0
+    """
+    model_func, ns, pts_list, params = point
+
+    return np.ma.filled(extrapolated_model(model_func)(list(params), [ns], pts_list), 0)
+
+
+def build_bank(model_func, ns, pts_list, path, nb=20, workers=1):
+    """
+    Compute the expected-SFS bank of a model, once before the inferences - c.f. the subcommand
+    bank.
+
+    The bank is a single numpy array on disk, with for each point of the lattice - c.f.
+    bank_lattice - its parameters followed by the extrapolated spectrum of the model, unfolded
+    and with the masked entries set to 0.
+
+    Parameter
+    ---------
+    model_func: function
+        the custom model_func - either sudden_decline_model or twopops_migration_model
+    ns: int
+        the number of sampled genomes
+    pts_list: list
+        the grid point use for extrapolation
+    path: str
+        the directory of the banks
+    nb: int
+        the number of values of each parameter in the lattice
+    workers: int
+        the number of processes on which the spectra are computed
+
+    Return
+    ------
+    filout: str
+        the file of the bank, c.f. bank_file
+    """
+    filout = bank_file(model_func, ns, pts_list, path, nb)
+    lattice = bank_lattice(nb)
+    points = [(model_func, ns, tuple(pts_list), tuple(params)) for params in lattice]
+
+    if workers > 1:
+        with Pool(processes=workers) as pool:
+            spectra = pool.map(bank_spectrum, points)
+    else:
+        spectra = [bank_spectrum(point) for point in points]
+
+    # Save in a temporary file, so a job never loads an incomplete bank
+    os.makedirs(path, exist_ok=True)
+    np.save("{}.{}.npy".format(filout, os.getpid()), np.column_stack((lattice, spectra)))
+    os.replace("{}.{}.npy".format(filout, os.getpid()), filout)
+
+    return filout
+
+
+def load_bank(model_func, ns, pts_list, path, nb=20):
+    """
+    Expected-SFS bank of a model - memory-mapped.
+
+    The bank is built once by build_bank, before the inferences. If it's missing, the inference
+    stops at once instead of computing it in each job.
+
+    Parameter
+    ---------
+    model_func, ns, pts_list, path, nb
+        c.f. build_bank
+
+    Return
+    ------
+    bank: numpy memmap
+        (nb*nb) * (2 + ns+1) array
+    """
+    filin = bank_file(model_func, ns, pts_list, path, nb)
+
+    if not os.path.isfile(filin):
+        sys.exit("Error \"load_bank\": no expected-SFS bank {}, build it first with the "
+                 "subcommand bank".format(filin))
+
+    return np.load(filin, mmap_mode='r')
+
+
+def bank_start(bank, sfs, fold, fixed=None, value=None):
+    """
+    Starting point of the optimization - the best point of the expected-SFS bank.
+
+    Every spectrum of the bank is scored against the observed SFS at once, c.f.
+    multinomial_scores. With a fixed parameter, only the points of the lattice with the value
+    of the fixed parameter the closest to its value are used.
+
+    Parameter
+    ---------
+    bank: numpy array
+        the expected-SFS bank, c.f. load_bank
+    sfs: list
+        the observed SFS - without corners 0/n & n/n
+    fold: bool
+        if the SFS must be fold (True) or not (False)
+    fixed, value: str, float
+        the fixed parameter and its value
+
+    Return
+    ------
+    p0: list
+        the parameters evaluated by dadi at the best point, c.f. params_model
+    """
+    lattice, spectra = bank[:, :2], bank[:, 2:]
+
+    if fixed is not None:
+        column = 0 if fixed == 'kappa' else 1  # Columns (Kappa, Tau) or (Kappa, m12)
+        distance = np.abs(np.log10(lattice[:, column]) - np.log10(value))
+        nearest = distance == distance.min()
+        lattice, spectra = lattice[nearest], spectra[nearest]
+
+    if fold:
+        spectra = fold_spectra(spectra)
+
+    ll_model, _ = multinomial_scores(spectra, observed_replicates(sfs, fold))
+    kappa, other = lattice[np.argmax(ll_model)]
+
+    if fixed == 'kappa':
+        return [other]
+    if fixed is not None:
+        return [kappa]
+    return [kappa, other]
+
+
+def likelihood_surface(params_list, model_func, sfs_observed, fold, pts_list, fixed=None,
+                       value=None):
+    """
+    Log-likelihood surface of several observed SFS for a model with given parameters.
+
+    The spectrum of each set of parameters is computed once - c.f. model_spectrum - and all the
+    replicates are scored against it at once - c.f. batch_scoring.
+
+    Parameter
+    ---------
+    params_list: list
+        the sets of parameters at which the surface is evaluated
+    model_func: function
+        the custom model_func
+    sfs_observed: list or numpy array
+        the replicates of the observed SFS - without corners 0/n & n/n
+    fold: bool
+        if the SFS must be fold (True) or not (False)
+    pts_list: list
+        the grid point use for extrapolation
+    fixed, value: str, float
+        the fixed parameter and its value
+
+    Return
+    ------
+    ll_model: numpy array
+        len(params_list) * replicates array of log-likelihood
+    theta: numpy array
+        len(params_list) * replicates array of the optimal theta
+    """
+    data = observed_replicates(sfs_observed, fold)
+    ns = [data.shape[1] - 1]
+
+    model_func = fixed_model(model_func, fixed, value)
+
+    surface = [
+        batch_scoring(model_spectrum(model_func, params, ns, pts_list, fold), data, fold)
+        for params in params_list
+    ]
+
+    return np.array([ll for ll, _ in surface]), np.array([theta for _, theta in surface])
+
+
+def constant_inference(pts_list, model_func, sfs_observed, fold):
+    """
+    Dadi inference of several observed SFS with the constant model.
+
+    No parameters to optimize, the spectrum is computed once and all the replicates are scored
+    against it at once - c.f. batch_scoring.
 
     Parameter
     ---------
     pts_list: list
         the grid point use for extrapolation
+    model_func: function
+        the constant model_func
+    sfs_observed: list or numpy array
+        the replicates of the observed SFS - without corners 0/n & n/n
+    fold: bool
+        if the SFS must be fold (True) or not (False)
+
+    Return
+    ------
+    ll_model: numpy array
+        likelihood of each replicate
+    model: list
+        the sfs inferred - without corners 0/n & n/n
+    """
+    data = observed_replicates(sfs_observed, fold)
+    inferred_sfs = model_spectrum(model_func, None, [data.shape[1] - 1], pts_list)
+
+    ll_model, _ = batch_scoring(inferred_sfs, data, fold)
+
+    return ll_model, list(inferred_sfs)[1:-1]
+
+
+def inference(pts_list, model_func, fixed=None, value=None, verbose=0, path="./Data/",
+              name="SFS", sfs=None, fold=False, p0=None, optimizer=None):
+    """
+    Dadi inference.
+
+    Parameter
+    ---------
+    pts_list: list or int
+        the grid point use for extrapolation - or a single grid size, the model is then
+        evaluated without extrapolation
     model_func: function
         the custom model_func
+    fixed: str
+        the fixed parameter, either tau, kappa, m12 or None
+    value: float
+        the value of the fixed parameter
+    sfs: list, numpy array or dadi.Spectrum
+        the observed SFS in memory - if None, the SFS is loaded from the file path/name.fs
+    fold: bool
+        if sfs is a list or a numpy array, the SFS must be fold (True) or not (False)
+    p0: list
+        starting point of the optimization - if None, the default initial guess is perturbed
+    optimizer: dictionary
+        the settings of the optimizer, c.f. optimizer_settings
 
     Return
     ------
@@ -229,55 +1203,64 @@ def inference(pts_list, model_func, fixed=None, value=None, verbose=0, path="./D
         the optimal value of theta given the model
     model: list
         the sfs inferred
+    optimization: dictionary
+        only for the custom model - convergence diagnostics of the optimizer, c.f.
+        parameters_optimization, and execution time of the inference
     """
-    global FIXED, VALUE
-    FIXED = fixed
-    VALUE = value
+    start_time = time.time()
 
     # Load the data
-    observed_sfs = dadi.Spectrum.from_file("{}{}.fs".format(path, name))
+    if sfs is None:
+        observed_sfs = dadi.Spectrum.from_file("{}{}.fs".format(path, name))
+    elif isinstance(sfs, dadi.Spectrum):
+        observed_sfs = sfs
+    else:
+        observed_sfs = observed_spectrum(sfs, fold)
     ns = observed_sfs.sample_sizes
 
-    # Make the extrapolation version of our demographic model function
-    model_func_extrapolated = dadi.Numerics.make_extrap_log_func(model_func)
+    if optimizer is None:
+        optimizer = optimizer_settings()
+
+    # Make the extrapolation version of our demographic model function - with a single grid
+    # size, the model function is evaluated directly
+    if isinstance(pts_list, int):
+        model_func_extrapolated = fixed_model(model_func, fixed, value)
+    elif optimizer['Grid workers'] > 1 and model_func.__name__ != 'constant_model':
+        model_func_extrapolated = parallel_extrapolated_model(
+            model_func, fixed, value, optimizer['Grid workers'], optimizer['Grid backend']
+        )
+    else:
+        model_func_extrapolated = extrapolated_model(fixed_model(model_func, fixed, value))
 
     # Optimisation of model parameters
     if model_func.__name__ == 'constant_model':
-        inferred_sfs = model_func_extrapolated(ns, pts_list)
+        # No parameters - the spectrum is computed once per sample size and grid
+        inferred_sfs = model_spectrum(model_func, None, ns, pts_list)
 
     else:
         # Set up:
         #   - p0: initial guess for the parameters, which is somewhat arbitrary
         #   - lower & upper bound for the optimization
+        default_p0, lower_bound, upper_bound = parameters_bounds(fixed)
 
-        if FIXED == 'tau':  # Fixed param: (Tau) & Param evaluates: (Kappa)
-            # Param: (Kappa)
-            p0, lower_bound, upper_bound = [1.0], [1e-4], [1e3]
-
-        elif FIXED == 'kappa':  # Fixed param: (Kappa) & Param evaluates: (Tau)
-            # Param: (Tau)
-            p0, lower_bound, upper_bound = [0.], [1e-4], [1e4]
-
-        elif FIXED == 'm12':  # Fixed param: (m12), the migration rate into 1 from 2
-            # Pram: (m12)
-            p0, lower_bound, upper_bound = [1.0], [1e-4], [1e3]
-
-        else:  # Params evaluate: (Kappa, Tau) or (Kappa, m12)
-            p0, lower_bound, upper_bound = [1.0, 0.], [1e-4, 1e-4], [1e3, 1e4]
+        popt, diagnostics = parameters_optimization(
+            default_p0 if p0 is None else p0, observed_sfs, model_func_extrapolated, pts_list,
+            lower_bound, upper_bound, verbose=verbose, perturb=p0 is None, optimizer=optimizer
+        )
 
-        popt = parameters_optimization(p0, observed_sfs, model_func_extrapolated, pts_list,
-                                       lower_bound, upper_bound, verbose=verbose)
-        
         # Simulated frequency spectrum
         inferred_sfs = model_func_extrapolated(popt, ns, pts_list)
 
         # Keep track of parameters after optimization
-        if FIXED == 'tau':
-            params_estimated = {'Tau': VALUE, 'Kappa': popt[0]}
-        elif FIXED == 'kappa':
-            params_estimated = {'Tau': popt[0], 'Kappa': VALUE}
-        elif FIXED == 'm12':
-            params_estimated = {'Tau': popt[0], 'Kappa': VALUE}
+        if fixed == 'tau':
+            params_estimated = {'Tau': value, 'Kappa': popt[0]}
+        elif fixed == 'kappa':
+            if model_func.__name__ == 'sudden_decline_model':
+                params_estimated = {'Tau': popt[0], 'Kappa': value}
+            else:
+                params_estimated = {'m12': popt[0], 'Kappa': value}
+        elif fixed == 'm12':
+            params_estimated = {'m12': value, 'Kappa': popt[0]}
         elif model_func.__name__ == 'sudden_decline_model':
             params_estimated = {'Tau': popt[1], 'Kappa': popt[0]}
         else:
@@ -297,7 +1280,243 @@ def inference(pts_list, model_func, fixed=None, value=None, verbose=0, path="./D
         return ll_model, inferred_sfs
     
     params_estimated['Theta'] = theta
-    return ll_model, inferred_sfs, params_estimated
+    optimization = dict(diagnostics, Time=time.time() - start_time)
+
+    return ll_model, inferred_sfs, params_estimated, optimization
+
+
+def free_parameters(params_estimated, fixed):
+    """
+    Parameters evaluated by dadi from the estimated parameters of an inference, e.g. to start
+    another inference from its optimum - c.f. params_model.
+
+    Parameter
+    ---------
+    params_estimated: dictionary
+        the estimated parameters of the method inference
+    fixed: str
+        the fixed parameter, either tau, kappa, m12 or None
+    """
+    if fixed is None:
+        other = 'Tau' if 'Tau' in params_estimated else 'm12'
+        return [params_estimated['Kappa'], params_estimated[other]]
+
+    return [
+        ele for key, ele in params_estimated.items() if key.lower() not in [fixed, 'theta']
+    ]
+
+
+def restart_inference(restart):
+    """
+    One restart of the multi-start inference - run by the workers of multi_start_inference.
+
+    Parameter
+    ---------
+    restart: tuple
+        (pts_list, model_func, sfs, fold, fixed, value, p0, optimizer)
+    """
+    pts_list, model_func, sfs, fold, fixed, value, p0, optimizer = restart
+    return inference(pts_list, model_func, fixed=fixed, value=value, sfs=sfs, fold=fold, p0=p0,
+                     optimizer=optimizer)
+
+
+def multi_start_inference(pts_list, model_func, sfs, fold, fixed=None, value=None, restarts=2,
+                          pool=None, seed=None, bank=None, optimizer=None, agree=0, batch=1,
+                          ll_tol=1e-2, coarse=None, candidates=3):
+    """
+    Multi-start dadi inference of the custom model.
+
+    The starting points of the restarts are drawn from a latin hypercube within the bounds of
+    the parameters, and the restarts are run on a pool of processes if given. With an
+    expected-SFS bank, the first restart starts from the best point of the bank instead.
+
+    With early stopping, the restarts are run by batches and no more batch is run once agree
+    restarts have reached the best log-likelihood, i.e. successive restarts agree on the optimum.
+
+    In multi-fidelity, the restarts explore on a coarse grid without extrapolation and only the
+    best candidates are optimized again on the extrapolated grid, c.f. refine_inference.
+
+    Parameter
+    ---------
+    pts_list: list
+        the grid point use for extrapolation
+    model_func: function
+        the custom model_func
+    sfs: list
+        the observed SFS - without corners 0/n & n/n
+    fold: bool
+        if the SFS must be fold (True) or not (False)
+    fixed, value: str, float
+        the fixed parameter and its value
+    restarts: int
+        the number of restarts
+    pool: multiprocessing.Pool
+        pool of processes on which the restarts are run - if None, one after another
+    seed: int
+        the seed of the latin hypercube
+    bank: numpy array
+        the expected-SFS bank of model_func, c.f. load_bank
+    optimizer: dictionary
+        the settings of the optimizer, c.f. optimizer_settings
+    agree: int
+        the number of restarts that must reach the best log-likelihood to stop - if 0, all the
+        restarts are run
+    batch: int
+        the number of restarts run between two checks of the early stopping, e.g. the number of
+        processes of the pool
+    ll_tol: float
+        the tolerance on the log-likelihood for two restarts to agree
+    coarse: int
+        the size of the coarse grid for the multi-fidelity - if None, the restarts are run on
+        the extrapolated grid
+    candidates: int
+        the number of restarts optimized again on the extrapolated grid in multi-fidelity
+
+    Return
+    ------
+    inferences: list
+        for each restart run - or each candidate in multi-fidelity - the tuple (ll_model,
+        inferred_sfs, params_estimated, optimization) of the method inference
+    """
+    _, lower_bound, upper_bound = parameters_bounds(fixed)
+    starts = latin_hypercube(restarts, lower_bound, upper_bound, seed)
+
+    if bank is not None:
+        starts[0] = bank_start(bank, sfs, fold, fixed, value)
+
+    restarts = [
+        (pts_list if coarse is None else coarse, model_func, list(sfs), fold, fixed, value,
+         list(p0), optimizer)
+        for p0 in starts
+    ]
+
+    # Without early stopping, all the restarts in one batch
+    if not agree:
+        batch = max(len(restarts), 1)
+
+    inferences = []
+    for i in range(0, len(restarts), batch):
+        if pool is None:
+            inferences += [restart_inference(restart) for restart in restarts[i:i+batch]]
+        else:
+            inferences += pool.map(restart_inference, restarts[i:i+batch])
+
+        # Early stopping - number of restarts with the best log-likelihood
+        if agree:
+            best_ll = max(ll for ll, *_ in inferences)
+            if sum(best_ll - ll <= ll_tol for ll, *_ in inferences) >= agree:
+                break
+
+    if coarse is None:
+        return inferences
+    return refine_inference(pts_list, model_func, sfs, fold, fixed, value, inferences,
+                            candidates=candidates, pool=pool, optimizer=optimizer)
+
+
+def refine_inference(pts_list, model_func, sfs, fold, fixed, value, inferences, candidates=3,
+                     pool=None, optimizer=None):
+    """
+    Multi-fidelity - optimization on the extrapolated grid of the best coarse inferences.
+
+    Each candidate starts from its optimum on the coarse grid, and the log-likelihood, number of
+    evaluations and execution time on the coarse grid are kept with its optimization, so the
+    agreement of the two fidelities can be checked.
+
+    Parameter
+    ---------
+    pts_list: list
+        the grid point use for extrapolation
+    model_func: function
+        the custom model_func
+    sfs: list
+        the observed SFS - without corners 0/n & n/n
+    fold: bool
+        if the SFS must be fold (True) or not (False)
+    fixed, value: str, float
+        the fixed parameter and its value
+    inferences: list
+        the inferences on the coarse grid, c.f. multi_start_inference
+    candidates: int
+        the number of inferences with the highest log-likelihood optimized again
+    pool, optimizer
+        c.f. multi_start_inference
+
+    Return
+    ------
+    inferences: list
+        for each candidate, the tuple (ll_model, inferred_sfs, params_estimated, optimization)
+        of the method inference on the extrapolated grid - with the key Coarse in optimization
+    """
+    best = sorted(inferences, key=lambda ele: ele[0], reverse=True)[:candidates]
+
+    restarts = [
+        (pts_list, model_func, list(sfs), fold, fixed, value,
+         free_parameters(params_estimated, fixed), optimizer)
+        for _, _, params_estimated, _ in best
+    ]
+
+    if pool is None:
+        refined = [restart_inference(restart) for restart in restarts]
+    else:
+        refined = pool.map(restart_inference, restarts)
+
+    for (ll_coarse, _, _, coarse), (*_, optimization) in zip(best, refined):
+        optimization['Coarse'] = {
+            'LL': ll_coarse, 'Evaluations': coarse['Evaluations'], 'Time': coarse['Time']
+        }
+
+    return refined
+
+
+def profile_inference(pts_list, model_func, sfs, fold, fixed, values, restarts=2, pool=None,
+                      seed=None, optimizer=None, agree=0, batch=1):
+    """
+    Profile of the log-likelihood along the values of the fixed parameter - warm-started.
+
+    The optima for two neighbouring values of the fixed parameter are close, so only the first
+    value is inferred from scratch - with a multi-start inference - and the inference for each
+    next value starts from the optimum of the previous one.
+
+    Parameter
+    ---------
+    pts_list: list
+        the grid point use for extrapolation
+    model_func: function
+        the custom model_func
+    sfs: list
+        the observed SFS - without corners 0/n & n/n
+    fold: bool
+        if the SFS must be fold (True) or not (False)
+    fixed: str
+        the fixed parameter, either tau, kappa or m12
+    values: list
+        the values of the fixed parameter, in the order of the sweep
+    restarts, pool, seed, optimizer, agree, batch
+        the multi-start inference of the first value, c.f. multi_start_inference
+
+    Return
+    ------
+    profile: list
+        for each value, the tuple (ll_model, inferred_sfs, params_estimated, optimization) of
+        the method inference
+    """
+    profile = []
+
+    for value in values:
+        if not profile:
+            inferences = multi_start_inference(
+                pts_list, model_func, sfs, fold, fixed=fixed, value=value, restarts=restarts,
+                pool=pool, seed=seed, optimizer=optimizer, agree=agree, batch=batch
+            )
+            profile.append(max(inferences, key=lambda ele: ele[0]))
+
+        else:
+            # Starting point - the optimum of the free parameter for the previous value
+            profile.append(inference(pts_list, model_func, fixed=fixed, value=value, sfs=sfs,
+                                     fold=fold, p0=free_parameters(profile[-1][2], fixed),
+                                     optimizer=optimizer))
+
+    return profile
 
 
 if __name__ == "__main__":
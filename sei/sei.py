@@ -7,6 +7,7 @@ import os
 import sys
 import time
 import warnings
+from multiprocessing import Pool
 import pandas as pd
 import numpy as np
 from scipy.stats import chi2
@@ -65,6 +66,27 @@ def define_parameters(model, typ):
     return params
 
 
+def define_jobs(job, job_range):
+    """
+    Define the list of jobs, i.e. cells of the grid of parameters, to process.
+
+    Parameter
+    ---------
+    job: int
+        a single job - from 1 to the size of the grid
+    job_range: tuple
+        pair (start, end) of jobs to process in the same run, end included
+
+    Return
+    ------
+    jobs: list
+        the jobs to process one after another
+    """
+    if job_range is not None:
+        return list(range(job_range[0], job_range[1] + 1))
+    return [job]
+
+
 ######################################################################
 # SFS shape verification                                             #
 ######################################################################
@@ -145,25 +167,31 @@ def generate_set_sfs():
 def length_from_file(fichier, params, mu, snp):
     """
     Extract length factor from file and return the length of the sequence.
-    """
-    res = pd.read_json(path_or_buf="{}".format(fichier), typ='frame')
-
-    # Bug of to_json or from_json method of pandas
-    # Some value of tau, kappa or m12 with many decimal points
-    for i, row in res.iterrows():
-        res.at[i, 'Parameters'] = {k: round(v, 2) for k, v in row['Parameters'].items()}
 
-    factor = res[res['Parameters'] == params]['Factor'].values[0]
+    The file is parsed once and the factor looked up by parameters - c.f. f.length_factor.
+    """
+    factor = f.length_factor(fichier, params)
 
     return (snp / factor) / (4 * 1 * mu)
 
 
-def generate_data(params, model, nb_simu, path_data, path_length, typ):
+def generate_data(params, model, nb_simu, path_data, path_length, typ, workers=1, snp=None,
+                  trim=False, trees=False, seed=None):
     """
     Generate a set of data with msprime.
+
+    If snp is given, each SFS is simulated by chunks until snp SNPs - c.f. generate_sfs - and
+    the length factor file isn't needed.
+
+    If trees, the tree sequence of a VCF is archived in path_data.trees.gz - c.f. generate_vcf.
+
+    seed is the base seed of the SFS, c.f. generate_sfs.
     """
     # Define length
-    length = length_from_file(path_length, params, mu=8e-2, snp=10000) if typ == 'sfs' else 1e3
+    if typ == 'sfs' and snp is None:
+        length = length_from_file(path_length, params, mu=8e-2, snp=10000)
+    else:
+        length = None if typ == 'sfs' else 1e3
 
     # Convert params from log scale
     params.update({k: (np.power(10, v) if k != 'm21' else v) for k, v in params.items()})
@@ -173,10 +201,10 @@ def generate_data(params, model, nb_simu, path_data, path_length, typ):
         simulation_parameters(sample=20, ne=1, rcb_rate=8e-2, mu=8e-2, length=length))
 
     if typ == 'sfs':
-        data = generate_sfs(params, model, nb_simu)
+        data = generate_sfs(params, model, nb_simu, workers, snp=snp, trim=trim, seed=seed)
 
     else:
-        data = generate_vcf(params)
+        data = generate_vcf(params, model, "{}.trees.gz".format(path_data) if trees else None)
 
     print("SNPs: {}".format(round(np.mean(data['SNPs'][0]))))
     
@@ -189,86 +217,353 @@ def generate_data(params, model, nb_simu, path_data, path_length, typ):
 
 # Generate SFS
 
-def generate_sfs(params, model, nb_simu):
+def simulate_replicate(replicate):
+    """
+    Simulate one replicate with msprime - the seed depends on the model, the parameters, the
+    replicate index and the base seed only, c.f. ms.simulation_seed.
+
+    Parameter
+    ---------
+    replicate: tuple
+        (params, model, index, snp, trim, seed) with index the index of the replicate, snp, trim
+        the target number of SNPs - c.f. ms.msprime_simulation_snp - or None and seed the base
+        seed of the run
+
+    Return
+    ------
+    Tuple (SFS, length, execution time)
+    """
+    params, model, index, snp, trim, seed = replicate
+    start_time = time.time()
+    seed = ms.simulation_seed(model, params, index, seed)
+
+    if snp is None:
+        sfs_observed = ms.msprime_simulation(model=model, params=params, random_seed=seed)
+        length = params['length']
+    else:
+        sfs_observed, length = ms.msprime_simulation_snp(
+            model=model, params=params, snp=snp, trim=trim, random_seed=seed
+        )
+
+    return sfs_observed, length, time.time() - start_time
+
+
+def generate_sfs(params, model, nb_simu, workers=1, snp=None, trim=False, seed=None):
     """
     Generate a set of unfolded sfs of fixed SNPs size with msprime.
+
+    If workers > 1, the replicates are simulated on a pool of workers processes.
+
+    If snp is given, each replicate is simulated by independent chunks of genome until snp
+    SNPs - trimmed to exactly snp SNPs if trim - and the length of the parameters is the mean
+    length of the replicates.
+
+    The base seed of the replicates is seed, or a random one if None - c.f. ms.base_seed. It's
+    saved in the column Seed.
     """
-    sfs, snp, execution = [], [], []
-    for i in range(nb_simu):
-        start_time = time.time()
+    seed = ms.base_seed(seed)
+    replicates = [(params, model, i, snp, trim, seed) for i in range(nb_simu)]
+
+    if workers > 1:
+        with Pool(processes=workers) as pool:
+            simulations = pool.map(simulate_replicate, replicates)
+    else:
+        simulations = [simulate_replicate(replicate) for replicate in replicates]
 
-        sfs_observed = ms.msprime_simulation(model=model, params=params)
+    sfs = [sfs_observed for sfs_observed, _, _ in simulations]
+    snp = [sum(sfs_observed) for sfs_observed in sfs]
+    execution = [execution_time for _, _, execution_time in simulations]
 
-        sfs.append(sfs_observed)
-        snp.append(sum(sfs_observed))
-        execution.append(time.time() - start_time)
+    # Mean length of the replicates simulated by chunks
+    params = dict(params, length=np.mean([length for _, length, _ in simulations]))
 
     # Create DataFrame from dictionary
     dico = {
         'Parameters': [params], 'SNPs': [snp], 'SFS observed': [sfs],
-        'Time': [round(np.mean(execution), 4)]
+        'Time': [round(np.mean(execution), 4)], 'Seed': [seed]
     }
     return pd.DataFrame(dico)
 
 
+def simulate_rates_replicate(replicate):
+    """
+    Simulate one replicate with msprime for several mutation rates - one ancestry, c.f.
+    ms.msprime_simulation_rates.
+
+    Parameter
+    ---------
+    replicate: tuple
+        (params, model, rates, index, seed) with index the index of the replicate and seed the
+        base seed of the run
+
+    Return
+    ------
+    Pair (SFS for each rate, execution time)
+    """
+    params, model, rates, index, seed = replicate
+    start_time = time.time()
+
+    # The rates are part of the simulation, e.g. the SNPs targets of optsnp
+    seed = ms.simulation_seed(model, dict(params, rates=rates), index, seed)
+
+    sfs_observed = ms.msprime_simulation_rates(
+        model=model, params=params, rates=rates, random_seed=seed
+    )
+
+    return sfs_observed, time.time() - start_time
+
+
+def generate_sfs_rates(params, model, rates, nb_simu, workers=1, seed=None):
+    """
+    Generate a set of unfolded sfs with msprime for each mutation rate.
+
+    The ancestry of each replicate is simulated once and shared by all the mutation rates. If
+    workers > 1, the replicates are simulated on a pool of workers processes. The base seed is
+    seed, or a random one if None - c.f. ms.base_seed.
+
+    Return
+    ------
+    data: DataFrame
+        one row for each mutation rate, same columns as generate_sfs - the execution time is
+        the one of a replicate for all the rates
+    """
+    seed = ms.base_seed(seed)
+    replicates = [(params, model, rates, i, seed) for i in range(nb_simu)]
+
+    if workers > 1:
+        with Pool(processes=workers) as pool:
+            simulations = pool.map(simulate_rates_replicate, replicates)
+    else:
+        simulations = [simulate_rates_replicate(replicate) for replicate in replicates]
+
+    execution = round(np.mean([execution_time for _, execution_time in simulations]), 4)
+
+    rows = []
+    for i, rate in enumerate(rates):
+        sfs = [sfs_observed[i] for sfs_observed, _ in simulations]
+        rows.append({
+            'Parameters': dict(params, mu=rate), 'SNPs': [sum(ele) for ele in sfs],
+            'SFS observed': sfs, 'Time': execution, 'Seed': seed
+        })
+
+    return pd.DataFrame(rows)
+
+
 # Generate VCF
 
-def generate_vcf(params):
+def generate_vcf(params, model, path_trees=None):
     """
-    Generate a set of unfolded sfs of fixed SNPs size with msprime.
+    Generate a set of unfolded sfs of fixed SNPs size with msprime, for the msprime model.
+
+    If path_trees is given, the tree sequence is archived in it - c.f. f.save_trees - instead
+    of the variants, which are then derived from it on demand - c.f. simulation_variants. Only
+    the name of the archive is recorded, it's found next to the simulation file whatever the
+    working directory - c.f. f.trees_archive.
     """
     start_time = time.time()
 
-    sfs, variants = ms.msprime_simulate_variants(params, debug=True)
-            
+    if path_trees is None:
+        sfs, variants = ms.msprime_simulate_variants(model, params, debug=True)
+    else:
+        tree_seq = ms.msprime_simulate_trees(model, params, debug=True)
+        sfs, _ = ms.compute_sfs(tree_seq, params['sample_size'])
+        f.save_trees(tree_seq, path_trees)
+
     # Create DataFrame from dictionary
     dico = {
         'Parameters': [params], 'SNPs': [sum(sfs)], 'SFS observed': [sfs],
-        'Variants': [variants], 'Time': [time.time() - start_time]
+        'Time': [time.time() - start_time]
     }
+    if path_trees is None:
+        dico['Variants'] = [variants]
+    else:
+        dico['Trees'] = [os.path.basename(path_trees)]
+
     return pd.DataFrame(dico)
 
 
 ######################################################################
-# Grip point optimization                                            #
+# Sweep over the grid of parameters                                  #
 ######################################################################
 
-def grid_optimisation():
+def simulation_files(model, typ, params):
+    """
+    Set up the msprime model and the files of a given cell of the grid of parameters.
+
+    Parameter
+    ---------
+    model: str
+        either decline or migration
+    typ: str
+        either sfs or vcf
+    params: dictionary
+        a cell of the grid, i.e. pair (Tau, Kappa) or (m12, Kappa) - log scale
+
+    Return
+    ------
+    model: function
+        the msprime model
+    path_data: str
+        the file in which the simulated data are saved
+    path_length: str
+        the length factor file
     """
-    Define the optimal value of the smallest size of the grid point.
+    # Simulation of sudden decline model with msprime for various tau & kappa
+    if model == 'decline':
+        path_data = (
+            "./Data/Msprime/{0}/{3}_{0}_tau={1}_kappa={2}"
+        ).format(model, params['Tau'], params['Kappa'], typ.upper())
+        function = ms.sudden_decline_model
+
+    # Simulation of two populations migration models for various migration into 1 from
+    # 2 (with m12 the migration rate) and no migration into 2 from 1
+    # Population 1 size is pop1 and population 2 size is pop2 = kappa*pop1
+    else:
+        path_data = (
+            "./Data/Msprime/{0}/{3}_{0}_m12={1}_kappa={2}"
+        ).format(model, params['m12'], params['Kappa'], typ.upper())
+        function = ms.twopops_migration_model
+
+    path_length = "./Data/Msprime/length_factor-{}".format(model)
+
+    return function, path_data, path_length
+
+
+def sweep_cell(cell):
     """
-    mu_list, log_scale = [2e-3, 4e-3, 8e-3, 12e-3], [1, 2, 4, 6, 10, 20, 40, 60]
+    Simulate a cell of the grid of parameters - run by the workers of sweep_parameters.
+
+    Parameter
+    ---------
+    cell: tuple
+        (job, params, model, typ, nb_simu, snp, trim, seed) with job the index of the cell in the
+        grid, from 1 to the size of the grid, snp, trim the target number of SNPs or None and
+        seed the base seed of the sweep
 
-    dico = {}
+    Return
+    ------
+    job: int
+        the index of the simulated cell
+    """
+    job, params, model, typ, nb_simu, snp, trim, seed = cell
+    function, path_data, path_length = simulation_files(model, typ, params)
 
-    for mu in mu_list:
-        # Parameters for the simulation
-        fixed_params = simulation_parameters(sample=20, ne=1, rcb_rate=mu, mu=mu, length=1e5)
-        print("Msprime simulation - sample size {} & mutation rate {}".format(20, mu))
+    generate_data(params, function, nb_simu, path_data, path_length, typ, snp=snp, trim=trim,
+                  seed=seed)
 
-        # Msprime simulation
-        sfs = ms.msprime_simulation(model=ms.constant_model, fixed_params=fixed_params)
+    return job
 
-        # Generate the SFS file compatible with dadi
-        f.dadi_data(sfs, dadi.constant_model.__name__)
 
-        # Data
-        theoretical_theta = computation_theoretical_theta(ne=1, mu=mu, length=1e5)
-        dico[mu] = {
-            "Likelihood": [], "Estimated theta": [], "Theoretical theta": [theoretical_theta]*9
-        }
+def sweep_parameters(model, typ, nb_simu, start=1, end=None, workers=None, snp=None,
+                     trim=False, seed=None):
+    """
+    Simulate the grid of parameters define_parameters(model, typ), or a slice of it, on a local
+    pool of processes.
 
-        # Optimisation grid point for the extrapolation
-        for _, scale in enumerate(log_scale):
-            point = (len(sfs) - 1) * scale
-            pts_list = [point, point+10, point+20]
+    Each worker is a persistent process, so the modules are imported once per core instead of
+    once per cell. Every simulated cell is written in a manifest file and the cells already in
+    the manifest are skipped, so an interrupted sweep can be resumed.
 
-            likelihood, estimated_theta, _ = dadi.dadi_inference(pts_list, dadi.constant_model)
+    Parameter
+    ---------
+    model: str
+        either decline or migration
+    typ: str
+        either sfs or vcf
+    nb_simu: int
+        the number of replicates of each cell
+    start, end: int
+        slice of the grid to simulate, from 1 to the size of the grid (included) - same as the
+        job array of sei_migale.sh
+    workers: int
+        the number of processes, if None the number of cores
+    snp, trim: int, bool
+        the target number of SNPs of each SFS, c.f. generate_sfs - if None, the length of the
+        sequence comes from the length factor file
+    seed: int
+        the base seed of the sweep, if None a random one - c.f. ms.base_seed
+    """
+    grid = define_parameters(model, typ)
+    seed = ms.base_seed(seed)
+    end = len(grid) if end is None else min(end, len(grid))
+
+    # Cells already simulated
+    manifest = "./Data/Msprime/{}/sweep_{}-manifest".format(model, typ)
+    done = set()
+    if os.path.isfile(manifest):
+        with open(manifest, 'r') as filin:
+            done = {int(line.strip()) for line in filin if line.strip()}
+
+    cells = [
+        (job, grid[job-1], model, typ, nb_simu, snp, trim, seed)
+        for job in range(start, end + 1)
+        if job not in done
+    ]
+    print("Sweep {} - {} cells to simulate, {} already done".format(
+        model, len(cells), end - start + 1 - len(cells)))
+
+    with Pool(processes=workers) as pool, open(manifest, 'a') as filout:
+        for i, job in enumerate(pool.imap_unordered(sweep_cell, cells)):
+            # Keep track of the simulated cell as soon as it's over
+            filout.write("{}\n".format(job))
+            filout.flush()
+            print("Cell {}/{}".format(i+1, len(cells)), end="\r")
+
+
+######################################################################
+# Grip point optimization                                            #
+######################################################################
+
+def grid_optimisation(model, sample, tol=0.1, table="./Data/Dadi/pts_list.json"):
+    """
+    Define the cheapest grid point for the extrapolation with dadi within a tolerance.
+
+    For various grid points, the log-likelihood of the model is compared to the one on a finer
+    grid - the reference - at some parameters of the grid of simulations, c.f.
+    dadi.grid_benchmark. The fastest pts_list with an error lower than tol is then recorded in
+    the lookup table used by compute_dadi_inference - c.f. grid_points.
+
+    Parameter
+    ---------
+    model: str
+        either decline or migration
+    sample: int
+        the number of sampled monoploid genomes
+    tol: float
+        the tolerance on the log-likelihood
+    table: str
+        the json file of the lookup table
+    """
+    model_func = \
+        dadi.sudden_decline_model if model == 'decline' else dadi.twopops_migration_model
+
+    # Five parameters (Kappa, Tau) or (Kappa, m12) along the diagonal of the grid of simulations
+    grid, other = define_parameters(model, 'sfs'), 'Tau' if model == 'decline' else 'm12'
+    params_list = [
+        [np.power(10, params['Kappa']), np.power(10, params[other])]
+        for params in grid[::len(grid) // 4]
+    ]
+
+    # Candidate grid point, from a smallest size of sample/2 to sample*10
+    candidates = [
+        [round(sample*scale), round(sample*scale) + 10, round(sample*scale) + 20]
+        for scale in [0.5, 1, 2, 5, 10]
+    ]
+    reference = [sample*20, sample*20 + 10, sample*20 + 20]
 
-            dico[mu]["Likelihood"].append(likelihood)
-            dico[mu]["Estimated theta"].append(estimated_theta)
+    print("Benchmark of the grid point - {} model & sample size {}".format(model, sample))
+    benchmark = dadi.grid_benchmark(model_func, params_list, [sample], candidates, reference)
 
-    plot.plot_optimisation_grid(dico, log_scale)
+    for ele in benchmark:
+        print("  - pts_list {}: {:.4f}s & error {:.2e}"
+              .format(ele['pts_list'], ele['Time'], ele['Error']))
+
+    # The cheapest pts_list within the tolerance - the reference otherwise
+    within = [ele for ele in benchmark if ele['Error'] <= tol]
+    pts_list = min(within, key=lambda ele: ele['Time'])['pts_list'] if within else reference
+    print("Grid point for the extrapolation: {}".format(pts_list))
+
+    f.update_grid_points_table(table, model, sample, pts_list)
 
 
 ######################################################################
@@ -296,55 +591,35 @@ def dadi_params_optimisation(sample):
     # Grid point for the extrapolation
     pts_list = [sample*10, sample*10 + 10, sample*10 + 20]
 
-    # Set up the Pandas DataFrame
-    col = ["Theoretical theta", "Error rate", "mu"]
-    data = pd.DataFrame(columns=col)
-
-    # List of execution time of each simulation
-    execution_time = []
-
-    for mu in mu_list:
-        tmp = []
-
-        # Parameters for the simulation
-        params = simulation_parameters(sample=sample, ne=1, rcb_rate=mu, mu=mu, length=1e5)
-        print("Msprime simulation - sample size {} & mutation rate {}".format(sample, mu))
-
-        for i in range(nb_simu):
-            start_time = time.time()
-            print("Simulation: {}/{}".format(i+1, nb_simu), end="\r")
-
-            # Simulation for a constant population with msprime
-            sfs = ms.msprime_simulation(model=ms.constant_model, param=params)
-
-            # Generate the SFS file compatible with dadi
-            f.dadi_data(sfs, dadi.constant_model.__name__, path="./Data/Error_rate/",
-                        name="SFS-{}".format(sample))
-
-            # Dadi inference
-            _, estimated_theta, _ = dadi.dadi_inference(
-                pts_list, dadi.constant_model, path="./Data/Error_rate/",
-                name="SFS-{}".format(sample)
-            )
-
-            theoretical_theta = computation_theoretical_theta(ne=1, mu=mu, length=1e5)
-            error_rate = estimated_theta / theoretical_theta
+    # Parameters for the simulation - the ancestry of each replicate is simulated once for all
+    # the mutation rates, so the recombination rate is the same for all of them
+    params = simulation_parameters(sample=sample, ne=1, rcb_rate=mu_list[0], mu=mu_list[0],
+                                   length=1e5)
+    print("Msprime simulation - sample size {} & mutation rates {}".format(sample, mu_list))
 
-            row = {
-                "Theoretical theta": theoretical_theta, "Error rate": error_rate, "mu": mu
-            }
-            data = data.append(row, ignore_index=True)
+    # Simulation for a constant population with msprime - one row for each mutation rate
+    simulation = generate_sfs_rates(params, model=ms.constant_model, rates=mu_list,
+                                    nb_simu=nb_simu)
 
-            tmp.append(time.time() - start_time)
+    # Dadi inference - the optimal theta given the constant model, all replicates at once
+    spectrum = dadi.model_spectrum(dadi.constant_model, None, [sample], pts_list)
 
-        # Mean execution time for the 100 simulation with the same genome length and mu
-        mean_time = round(sum(tmp) / nb_simu, 3)
-        execution_time.extend([mean_time for _ in range(nb_simu)])
+    rows = []
+    for _, row in simulation.iterrows():
+        mu = row['Parameters']['mu']
+        _, estimated_theta = dadi.batch_scoring(
+            spectrum, dadi.observed_replicates(row['SFS observed'], fold=False), fold=False
+        )
 
-        data["Execution time"] = execution_time
+        theoretical_theta = computation_theoretical_theta(ne=1, mu=mu, length=1e5)
+        rows.extend([
+            {
+                "Theoretical theta": theoretical_theta, "Error rate": theta / theoretical_theta,
+                "mu": mu, "Execution time": row['Time']
+            } for theta in estimated_theta
+        ])
 
-    # Delete sfs file
-    os.remove("./Data/Error_rate/SFS-{}.fs".format(sample))
+    data = pd.DataFrame(rows)
 
     # Export data to csv file
     data.to_csv("./Data/Error_rate/error-rate-{}.csv".format(sample), sep='\t', index=False)
@@ -447,8 +722,35 @@ def weighted_square_distance(sfs):
     return sum(d2)
 
 
-def compute_dadi_inference(sfs_observed, models, sample, fold, path_data, job, dof, fixed,
-                           value):
+def grid_points(model_func, sample, table="./Data/Dadi/pts_list.json"):
+    """
+    Grid point for the extrapolation with dadi.
+
+    The grid points of the lookup table - c.f. grid_optimisation - if the model and the sample
+    size have been benchmarked, otherwise the default ones.
+
+    Parameter
+    ---------
+    model_func: function
+        the model M1 of the inference
+    sample: int
+        the number of sampled monoploid genomes
+    table: str
+        the json file of the lookup table
+    """
+    key = "{}-{}".format(model_func.__name__.split('_')[1], sample)
+    pts_list = f.grid_points_table(table).get(key)
+    if pts_list is not None:
+        return pts_list
+
+    if model_func.__name__.split('_', 1)[0] == 'twopops':  # migration
+        return [round(sample/2), round(sample/2) + 10, round(sample/2) + 20]
+    return [sample*10, sample*10 + 10, sample*10 + 20]  # suddden decline or growth
+
+
+def compute_dadi_inference(sfs_observed, models, sample, fold, dof, fixed, value, restarts=2,
+                           workers=1, bank=None, optimizer=None, agree=0, coarse=None,
+                           candidates=3):
     """
     Parameter
     ---------
@@ -465,6 +767,21 @@ def compute_dadi_inference(sfs_observed, models, sample, fold, path_data, job, d
         fixed parameter for the inference, either (tau), (kappa) or (migr)
     dof: int
         degrees of freedom
+    restarts: int
+        the number of inferences with M1 from the same observed SFS
+    workers: int
+        the number of processes on which the inferences with M1 are run
+    bank: str
+        the directory of the expected-SFS banks - if given, one inference with M1 starts from
+        the best point of the bank of M1
+    optimizer: dictionary
+        the settings of the optimizer of dadi, c.f. dadi.optimizer_settings
+    agree: int
+        early stopping of the inferences with M1 once agree of them reach the best
+        log-likelihood - if 0, all the restarts are run
+    coarse, candidates: int
+        multi-fidelity - size of the coarse grid, without extrapolation, on which the restarts
+        explore and number of them optimized again on the extrapolated grid
 
     Return
     ------
@@ -475,8 +792,11 @@ def compute_dadi_inference(sfs_observed, models, sample, fold, path_data, job, d
         List of log likelihood and sfs for the inference with M0
       - M1
         List of log likelihood, sfs and estimated parameters for the inference with M1.
-        In this case from the same observed SFS, 1000 inferences with M1 are made and only the
-        best one is kept. I.E. the one with the highest log-likelihood.
+        In this case from the same observed SFS, restarts inferences with M1 are made - from
+        starting points of a latin hypercube - and only the best one is kept. I.E. the one with
+        the highest log-likelihood. The log-likelihood, the convergence diagnostics of the
+        optimizer - number of evaluations of the model and of iterations, norm of the final
+        gradient & convergence - and the execution time of each restart are also kept.
       - Time
         Mean execution time for the inference
       - d2 observed inferred
@@ -485,70 +805,73 @@ def compute_dadi_inference(sfs_observed, models, sample, fold, path_data, job, d
         Weighted square distance between inferred SFS with M0 & M1
     """
     data = {
-        'LRT': [], 'M0': {'LL': [], 'SFS': []}, 'M1': {'LL': [], 'SFS': [], 'Estimated': []},
+        'LRT': [], 'M0': {'LL': [], 'SFS': []},
+        'M1': {'LL': [], 'SFS': [], 'Estimated': [], 'Restarts': []},
         'Time': 0, 'd2 observed inferred': [], 'd2 models': []
     }
     execution = []
 
     # Grid point for the extrapolation
-    if models['Inference'].__name__.split('_', 1)[0] == 'twopops':  # migration
-        pts_list = [round(sample/2), round(sample/2) + 10, round(sample/2) + 20]
-    else:  # suddden decline or growth
-        pts_list = [sample*10, sample*10 + 10, sample*10 + 20]
-
-    for i, sfs in enumerate(sfs_observed):
-        print("SFS observed {}".format(i))
-        # Generate the SFS file compatible with dadi
-        dadi_file = "SFS-{}".format(job) if value is None else "SFS_{}-{}".format(value, job)
-        f.dadi_data(sfs, models['Inference'].__name__, fold, path=path_data, name=dadi_file)
-
-        # Dadi inference for M0
-        # Pairs (Log-likelihood, Inferred SFS)
-        m0_inference = dadi.inference(pts_list, models['Control'], path=path_data,
-                                      name=dadi_file)
-        data['M0']['LL'].append(m0_inference[0])
-        data['M0']['SFS'].append(m0_inference[1])
-
-        # Dadi inference for M1
-        m1_inferences, m1_execution = [], []
-
-        for _ in range(2):  # Run 100 inferences with dadi from the observed sfs
-            start_inference = time.time()
-
-            # Pairs (Log-likelihood, Inferred SFS, Params)
-            tmp = dadi.inference(pts_list, models['Inference'], fixed=fixed, value=value,
-                                 path=path_data, name=dadi_file, verbose=True)
-
-            m1_inferences.append(tmp)
-            m1_execution.append(time.time() - start_inference)
-
-        execution.append(np.mean(m1_execution))
-
-        # m1_inferences is a list of pairs (Log-likelihood, Inferred SFS, Params)
-        # Compare each item of this list by the value at index 0, i.e. the log-likelihood and
-        # select the one with this highest value.
-        index_best_ll = m1_inferences.index((max(m1_inferences, key=lambda ele: ele[0])))
-
-        data['M1']['LL'].append(m1_inferences[index_best_ll][0])
-        data['M1']['SFS'].append(m1_inferences[index_best_ll][1])
-        data['M1']['Estimated'].append(m1_inferences[index_best_ll][2])
-
-        # Compute the log-likelihood ratio test between M0 and M1
-        data['LRT'].append(
-            likelihood_ratio_test(data['M0']['LL'][i], data['M1']['LL'][i], dof)
-        )
+    pts_list = grid_points(models['Inference'], sample)
+
+    # Expected-SFS bank of M1 for the warm start of the inferences
+    if bank is not None:
+        bank = dadi.load_bank(models['Inference'], sample, pts_list, bank)
+
+    # Dadi inference for M0 - the same spectrum for every observed SFS, all scored at once
+    # Log-likelihood of each observed SFS & Inferred SFS
+    m0_ll, m0_sfs = dadi.constant_inference(pts_list, models['Control'], sfs_observed, fold)
+
+    # Pool of processes for the inferences with M1
+    pool = Pool(processes=workers) if workers > 1 else None
+    try:
+        for i, sfs in enumerate(sfs_observed):
+            print("SFS observed {}".format(i))
+            data['M0']['LL'].append(float(m0_ll[i]))
+            data['M0']['SFS'].append(m0_sfs)
+
+            # Dadi inference for M1 - restarts inferences from the observed sfs
+            # Tuples (Log-likelihood, Inferred SFS, Params, Optimization)
+            m1_inferences = dadi.multi_start_inference(
+                pts_list, models['Inference'], sfs, fold, fixed=fixed, value=value,
+                restarts=restarts, pool=pool, seed=i, bank=bank, optimizer=optimizer, agree=agree,
+                batch=workers, coarse=coarse, candidates=candidates
+            )
+
+            data['M1']['Restarts'].append([
+                dict(optimization, LL=ll) for ll, _, _, optimization in m1_inferences
+            ])
+            execution.append(np.mean([optimization['Time'] for *_, optimization in m1_inferences]))
 
-        # Compute weighted square distance
-        data['d2 observed inferred'].append(
-            weighted_square_distance({'Observed': sfs, 'Model': data['M1']['SFS'][i]})
-        )  # d2 between the observed SFS & inferred SFS with M1
+            # m1_inferences is a list of tuples (Log-likelihood, Inferred SFS, Params,
+            # Optimization). Compare each item of this list by the value at index 0, i.e. the
+            # log-likelihood and select the one with this highest value.
+            index_best_ll = m1_inferences.index((max(m1_inferences, key=lambda ele: ele[0])))
 
-        data['d2 models'].append(
-            weighted_square_distance({'M0': data['M0']['SFS'][i], 'M1': data['M1']['SFS'][i]})
-        )  # d2 between the inferred SFS of two models - M0 & M1
+            data['M1']['LL'].append(m1_inferences[index_best_ll][0])
+            data['M1']['SFS'].append(m1_inferences[index_best_ll][1])
+            data['M1']['Estimated'].append(m1_inferences[index_best_ll][2])
 
-        if i == 1:
-            break
+            # Compute the log-likelihood ratio test between M0 and M1
+            data['LRT'].append(
+                likelihood_ratio_test(data['M0']['LL'][i], data['M1']['LL'][i], dof)
+            )
+
+            # Compute weighted square distance
+            data['d2 observed inferred'].append(
+                weighted_square_distance({'Observed': sfs, 'Model': data['M1']['SFS'][i]})
+            )  # d2 between the observed SFS & inferred SFS with M1
+
+            data['d2 models'].append(
+                weighted_square_distance({'M0': data['M0']['SFS'][i], 'M1': data['M1']['SFS'][i]})
+            )  # d2 between the inferred SFS of two models - M0 & M1
+
+            if i == 1:
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
     # Mean execution time for the inference
     data['Time'] = round(sum(execution) / len(sfs_observed), 4)
@@ -556,7 +879,9 @@ def compute_dadi_inference(sfs_observed, models, sample, fold, path_data, job, d
     return data
 
 
-def save_dadi_inference(simulation, models, fold, path_data, job, fixed, value):
+def save_dadi_inference(simulation, models, fold, path_data, job, fixed, value, restarts=2,
+                        workers=1, bank=None, optimizer=None, agree=0, coarse=None,
+                        candidates=3):
     """
     Inference with dadi.
 
@@ -580,16 +905,28 @@ def save_dadi_inference(simulation, models, fold, path_data, job, fixed, value):
         fixed parameter for the inference, either (tau), (kappa) or (migration)
     value
         Value of the fixed parameters for the inference - log scale
+    restarts, workers
+        Number of inferences with M1 for each observed SFS and number of processes to run them
+    bank
+        Directory of the expected-SFS banks for the warm start of M1, c.f. compute_dadi_inference
+    optimizer, agree
+        Settings of the optimizer of dadi and early stopping of the inferences with M1
+    coarse, candidates
+        Multi-fidelity of the inferences with M1, c.f. compute_dadi_inference
     """
     # Inference
     sfs_observed, sample = simulation['SFS observed'], simulation['Parameters']['sample_size']
 
     if value is None:
-        inf = compute_dadi_inference(sfs_observed, models, sample, fold, path_data, job, dof=2,
-                                     fixed=fixed, value=value)
+        inf = compute_dadi_inference(sfs_observed, models, sample, fold, dof=2, fixed=fixed,
+                                     value=value, restarts=restarts, workers=workers,
+                                     bank=bank, optimizer=optimizer, agree=agree,
+                                     coarse=coarse, candidates=candidates)
     else:
-        inf = compute_dadi_inference(sfs_observed, models, sample, fold, path_data, job, dof=2,
-                                     fixed=fixed, value=np.power(10, value))
+        inf = compute_dadi_inference(sfs_observed, models, sample, fold, dof=2, fixed=fixed,
+                                     value=np.power(10, value), restarts=restarts,
+                                     workers=workers, bank=bank, optimizer=optimizer,
+                                     agree=agree, coarse=coarse, candidates=candidates)
 
     # Save data
     params = {
@@ -619,11 +956,144 @@ def save_dadi_inference(simulation, models, fold, path_data, job, fixed, value):
     # Zip file
     f.zip_file(data="{}{}".format(path_data, name))
 
-    # Remove SFS file
-    if value is None:
-        os.remove("{}SFS-{}.fs".format(path_data, job))
-    else:
-        os.remove("{}SFS_{}-{}.fs".format(path_data, np.power(10, value), job))
+
+def define_profile(model, fixed):
+    """
+    Values of the fixed parameter for a profile of the log-likelihood - log scale.
+
+    Same values as the grid of parameters of the simulations, c.f. define_parameters.
+
+    Parameter
+    ---------
+    model: str
+        the simulation model, either decline or migration
+    fixed: str
+        the fixed parameter, either tau, kappa or m12
+    """
+    key = {'tau': 'Tau', 'kappa': 'Kappa', 'm12': 'm12'}[fixed]
+    return sorted({params[key] for params in define_parameters(model, 'sfs')})
+
+
+def compute_dadi_profile(sfs_observed, models, sample, fold, fixed, values, restarts=2,
+                         workers=1, optimizer=None, agree=0):
+    """
+    Profile of the log-likelihood of M1 along the values of the fixed parameter.
+
+    For each observed SFS, the values are swept in one run and each inference starts from the
+    optimum of the previous value, c.f. dadi.profile_inference.
+
+    Parameter
+    ---------
+    sfs_observed: list
+        the observed SFS generated with msprime
+    models: dictionary
+        the models M1 - Inference - and M0 - Control
+    sample: int
+        The number of sampled monoploid genomes
+    fixed: str
+        fixed parameter for the inference, either (tau), (kappa) or (m12)
+    values: list
+        the values of the fixed parameter - log scale
+    restarts, workers, optimizer, agree
+        the inference with M1 of the first value, c.f. compute_dadi_inference
+
+    Return
+    ------
+    data: dictionary
+      - M0
+        Log likelihood of each observed SFS with M0
+      - Profile
+        For each observed SFS, the log-likelihood, estimated parameters and convergence
+        diagnostics with M1 for each value of the fixed parameter
+      - Time
+        Mean execution time of the profile of an observed SFS
+    """
+    data = {'M0': [], 'Profile': [], 'Time': 0}
+    start_time = time.time()
+
+    # Grid point for the extrapolation
+    pts_list = grid_points(models['Inference'], sample)
+
+    # Dadi inference for M0
+    m0_ll, _ = dadi.constant_inference(pts_list, models['Control'], sfs_observed, fold)
+    data['M0'] = [float(ll) for ll in m0_ll]
+
+    # Pool of processes for the first inference with M1
+    pool = Pool(processes=workers) if workers > 1 else None
+    try:
+        for i, sfs in enumerate(sfs_observed):
+            print("SFS observed {}".format(i))
+
+            # Tuples (Log-likelihood, Inferred SFS, Params, Optimization) for each value
+            profile = dadi.profile_inference(
+                pts_list, models['Inference'], sfs, fold, fixed,
+                [float(value) for value in np.power(10, values)], restarts=restarts, pool=pool,
+                seed=i, optimizer=optimizer, agree=agree, batch=workers
+            )
+
+            data['Profile'].append({
+                'LL': [ll for ll, *_ in profile],
+                'Estimated': [estimated for _, _, estimated, _ in profile],
+                'Optimization': [optimization for *_, optimization in profile]
+            })
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # Mean execution time for the profile
+    data['Time'] = round((time.time() - start_time) / len(sfs_observed), 4)
+
+    return data
+
+
+def save_dadi_profile(simulation, models, fold, path_data, job, fixed, restarts=2, workers=1,
+                      optimizer=None, agree=0):
+    """
+    Profile of the log-likelihood with dadi - all the values of the fixed parameter in one
+    file, c.f. compute_dadi_profile.
+
+    Parameter
+    ---------
+    simulation: dictionary
+        Parameters, SNPs & SFS observed of the simulation with msprime
+    models: dictionary
+        the models M1 - Inference - and M0 - Control
+    fixed
+        fixed parameter of the profile, either (tau), (kappa) or (m12)
+    restarts, workers, optimizer, agree
+        Inference with M1 of the first value, c.f. save_dadi_inference
+    """
+    # Values of the fixed parameter - log scale
+    values = define_profile(models['Inference'].__name__.split('_')[1], fixed)
+
+    # Profile
+    sfs_observed, sample = simulation['SFS observed'], simulation['Parameters']['sample_size']
+
+    inf = compute_dadi_profile(sfs_observed, models, sample, fold, fixed, values,
+                               restarts=restarts, workers=workers, optimizer=optimizer,
+                               agree=agree)
+
+    # Save data
+    params = {
+        k: v for k, v in simulation['Parameters'].items() if k in ['Tau', 'Kappa', 'm12',
+                                                                   'm21']
+    }
+
+    # Create DataFrame from dictionary
+    dico = {
+        'Parameters': [params], 'SNPs': [simulation['SNPs']], 'Fixed': [fixed],
+        'Values': [values], 'M0': [inf['M0']], 'Profile': [inf['Profile']],
+        'Time': [inf['Time']]
+    }
+    data = pd.DataFrame(dico)
+
+    # Export dataframe to json files
+    name = "dadi_{}_profile_{}-{}".format(models['Inference'].__name__.split('_')[1], fixed, job)
+    data.to_json("{}{}".format(path_data, name))
+
+    # Zip file
+    f.zip_file(data="{}{}".format(path_data, name))
 
 
 ######################################################################
@@ -685,8 +1155,7 @@ def compute_optimization_dadi(filin, path_data, models, job):
     sfs_observed, sample = simulation['SFS observed'], simulation['Parameters']['sample_size']
 
     inf = compute_dadi_inference(
-        sfs_observed, models, sample, fold=False, path_data=path_data, job=job, dof=2,
-        fixed=None, value=None
+        sfs_observed, models, sample, fold=False, dof=2, fixed=None, value=None
     )
 
     # Save data
@@ -712,9 +1181,6 @@ def compute_optimization_dadi(filin, path_data, models, job):
     # Zip file
     f.zip_file(data="{}".format(filout))
 
-    # Remove SFS file
-    os.remove("{}SFS-{}.fs".format(path_data, job))
-
 
 ######################################################################
 # Inference with stairway plot 2                                     #
@@ -849,6 +1315,31 @@ def save_stairway_inference(simulation, model, fold):
 # Inference with SMC++                                               #
 ######################################################################
 
+def simulation_variants(simulation):
+    """
+    Variants of a simulation, derived from its tree sequence archive if any - c.f. generate_vcf.
+
+    Parameter
+    ---------
+    simulation: dictionary
+      - Parameters
+      - Variants or Trees: the variants, or the archive of the tree sequence
+
+    Return
+    ------
+    variants: list
+        List of position and genotype for each variant with 0 the ancestral state and 1 the
+        alternative one.
+    """
+    if 'Trees' not in simulation or not isinstance(simulation['Trees'], str):
+        return simulation['Variants']
+
+    tree_seq = f.load_trees(simulation['Trees'])
+    _, variants = ms.compute_sfs(tree_seq, simulation['Parameters']['sample_size'])
+
+    return variants
+
+
 def compute_smc_inference(simulation, param, filout, path_data):
     """
     Inference with SMC++:
@@ -856,7 +1347,7 @@ def compute_smc_inference(simulation, param, filout, path_data):
       - Perform the inference
     """
     # Generate the VCF file format
-    f.variants_to_vcf(simulation['Variants'], param, filout, path_data, ploidy=2)
+    f.variants_to_vcf(simulation_variants(simulation), param, filout, path_data, ploidy=2)
 
     # VCF file to SMC++ format
     f.vcf_to_smc(filout, path_data)
@@ -889,7 +1380,7 @@ def save_smc_inference(simulation, model):
         length L of the sequence, sample size.
       - Variants
         List of position and genotype for each variant with 0 the ancestral state and 1 the
-        alternative one.
+        alternative one - or Trees, the archive of the tree sequence, c.f. simulation_variants
 
     model: str
         either decline, migration or cst
@@ -925,9 +1416,11 @@ def save_smc_inference(simulation, model):
 # Optimization of inference with SMC++                               #
 ######################################################################
 
-def data_optimization_smc(model, filout):
+def data_optimization_smc(model, filout, trees=False):
     """
     Generate the data for the optimization of smc for various sequence length - from 1e2 to 5e6.
+
+    If trees, the tree sequence is archived instead of the variants - c.f. generate_vcf.
     """
     # Set up (Tau, Kappa) & length
     if model == 'decline':  # sudden decline
@@ -946,14 +1439,10 @@ def data_optimization_smc(model, filout):
         simulation_parameters(sample=20, ne=1, rcb_rate=8e-2, mu=8e-2, length=length)
     )
 
-    # Generation of data
-    sfs, variants = ms.msprime_simulate_variants(params, debug=True)
-
-    # Save data
-    dico = {
-        'Parameters': [params], 'SNPs': [sum(sfs)], 'SFS observed': [sfs], 'Variants': [variants]
-    }
-    data = pd.DataFrame(dico)
+    # Generation of data, with the tree sequence archived in filout.trees.gz if trees
+    # Growth & constant are a sudden decline with kappa < 1 & kappa = 1
+    data = generate_vcf(params, ms.sudden_decline_model,
+                        "{}.trees.gz".format(filout) if trees else None)
 
     # DataFrame to json
     data.to_json(filout)
@@ -975,8 +1464,10 @@ def compute_optimization_smc(filin, path_data):
 
     For each data, various inference are done with knot value from 2 to 8.
     """
-    # Load data
+    # Load data - the tree sequence archive is next to filin
     data = pd.read_json(filin).iloc[0]
+    if 'Trees' in data:
+        data['Trees'] = f.trees_archive(data['Trees'], os.path.dirname(filin))
 
     # Set up file & folder
     filout = "vcf_length={:.1e}".format(data['Parameters']['length'])
@@ -988,7 +1479,8 @@ def compute_optimization_smc(filin, path_data):
 
     # Variants to VCF format file
     f.variants_to_vcf(
-        variants=data['Variants'], param=data['Parameters'], fichier=filout, path_data=path_data
+        variants=simulation_variants(data), param=data['Parameters'], fichier=filout,
+        path_data=path_data
     )
 
     # VCF to SMC++ file
@@ -1025,8 +1517,6 @@ def main():
     """
     Le main du programme.
     """
-    # grid_optimisation()
-
     args = arg.arguments()
 
     if args.analyse == 'data':
@@ -1101,44 +1591,70 @@ def main():
 
             sys.exit()
 
-        # Simulation of sudden decline model with msprime for various tau & kappa
-        if args.model == 'decline':
-            params = define_parameters(args.model, args.typ)
-            params, model = params[args.job-1], ms.sudden_decline_model
-            path_data = (
-                "./Data/Msprime/{0}/{3}_{0}_tau={1}_kappa={2}"
-            ).format(args.model, params['Tau'], params['Kappa'], args.typ.upper())
-
-        # Simulation of two populations migration models for various migration into 1 from
-        # 2 (with m12 the migration rate) and no migration into 2 from 1
-        # Population 1 size is pop1 and population 2 size is pop2 = kappa*pop1
-        elif args.model == 'migration':
-            params = define_parameters(args.model, args.typ)
-            params, model = params[args.job-1], ms.twopops_migration_model
-
-            path_data = (
-                "./Data/Msprime/{0}/{3}_{0}_m12={1}_kappa={2}"
-            ).format(args.model, params['m12'], params['Kappa'], args.typ.upper())
+        grid = define_parameters(args.model, args.typ)
+
+        for job in define_jobs(args.job, args.job_range):
+            params = grid[job-1]
+            model, path_data, path_length = simulation_files(args.model, args.typ, params)
+
+            generate_data(params, model, nb_simu=2, path_data=path_data,
+                          path_length=path_length, typ=args.typ, workers=args.workers,
+                          snp=args.snp, trim=args.trim, trees=args.trees, seed=args.seed)
+
+    elif args.analyse == 'sweep':
+        sweep_parameters(args.model, args.typ, nb_simu=args.nb_simu, start=args.start,
+                         end=args.end, workers=args.workers, snp=args.snp, trim=args.trim,
+                         seed=args.seed)
+
+    elif args.analyse == 'bench' and args.stages:
+        # Five cells (Kappa, m12) along the diagonal of the grid of simulations
+        grid = define_parameters('migration', 'sfs')
+
+        for params in grid[::len(grid) // 4]:
+            for pts in grid_points(dadi.twopops_migration_model, args.sample):
+                stages = dadi.migration_model_stages(
+                    [np.power(10, params['Kappa']), np.power(10, params['m12'])],
+                    [args.sample], pts
+                )
+                print("Kappa={} m12={} pts={}: {}".format(
+                    params['Kappa'], params['m12'], pts,
+                    " - ".join("{} {:.4f}s".format(k, v) for k, v in stages.items())
+                ))
+
+    elif args.analyse == 'bench':
+        model_func = \
+            dadi.sudden_decline_model if args.model == 'decline' else dadi.twopops_migration_model
+
+        # Params (Kappa, Tau) or (Kappa, m12)
+        benchmark = dadi.benchmark_extrapolation(
+            model_func, [1.0, 1.0], [args.sample], grid_points(model_func, args.sample),
+            repeats=args.repeats, workers=args.workers, backend=args.backend
+        )
 
-        path_length = "./Data/Msprime/length_factor-{}".format(args.model)
+        print("Serial: {:.4f}s - Parallel: {:.4f}s - Speedup: {:.2f} - Max difference: {:.2e}"
+              .format(benchmark['Serial'], benchmark['Parallel'], benchmark['Speedup'],
+                      benchmark['Difference']))
 
-        generate_data(params, model, nb_simu=2, path_data=path_data, path_length=path_length,
-                      typ=args.typ)
+    elif args.analyse == 'grid':
+        grid_optimisation(args.model, args.sample, tol=args.tol)
 
     elif args.analyse == 'opt':
         dadi_params_optimisation(args.number)
 
+    elif args.analyse == 'bank':
+        model_func = \
+            dadi.sudden_decline_model if args.model == 'decline' else dadi.twopops_migration_model
+
+        filout = dadi.build_bank(model_func, args.sample, grid_points(model_func, args.sample),
+                                 "./Data/Dadi/Bank/", workers=args.workers)
+        print("Expected-SFS bank: {}".format(filout))
+
     elif args.analyse == 'inf':
-        # Export the observed data to DataFrame
         typ = 'VCF' if args.smc else 'SFS'
         path_sim = "./Data/Msprime/{}/".format(args.model)
-        simulation = f.export_simulation_files(typ=typ, path_data=path_sim, job=args.job - 1,
-                                               param=args.param, value=args.value)
 
-        # Inference with dadi
+        # Set up M0 & M1 model & path for the inference with dadi
         if args.dadi:
-
-            # Set up M0 & M1 model for the inference with dadi
             if args.model == "decline":
                 models = \
                     {'Inference': dadi.sudden_decline_model, 'Control': dadi.constant_model}
@@ -1151,18 +1667,48 @@ def main():
             else:
                 path_inf = "./Data/Dadi/{}/{}/".format(args.model, args.param)
 
+            # Profile of the log-likelihood - all the values of the fixed parameter
+            if args.profile:
+                path_inf = "./Data/Dadi/{}/profile/".format(args.model)
+
             path_inf += "Folded/" if args.fold else "Unfolded/"
 
-            save_dadi_inference(simulation, models, args.fold, path_inf, args.job,
-                                fixed=args.param, value=args.value)
+            # Expected-SFS banks of the models for the warm start of dadi
+            path_bank = "./Data/Dadi/Bank/"
 
-        # Inference with stairway plot 2
-        elif args.stairway:
-            save_stairway_inference(simulation, model=args.model, fold=args.fold)
+            # Settings of the optimizer of dadi
+            optimizer = dadi.optimizer_settings(
+                method=args.optimizer, maxiter=args.maxiter, maxfun=args.maxfun, tol=args.tol,
+                grid_workers=args.grid_workers
+            )
 
-        # Inference with SMC++
-        elif args.smc:
-            save_smc_inference(simulation, model=args.model)
+        for job in define_jobs(args.job, args.job_range):
+            # Export the observed data to DataFrame
+            simulation = f.export_simulation_files(typ=typ, path_data=path_sim, job=job - 1,
+                                                   param=None if args.profile else args.param,
+                                                   value=args.value)
+
+            # Inference with dadi
+            if args.dadi and args.profile:
+                save_dadi_profile(simulation, models, args.fold, path_inf, job, fixed=args.param,
+                                  restarts=args.restarts, workers=args.workers,
+                                  optimizer=optimizer, agree=args.agree)
+
+            elif args.dadi:
+                save_dadi_inference(simulation, models, args.fold, path_inf, job,
+                                    fixed=args.param, value=args.value,
+                                    restarts=args.restarts, workers=args.workers,
+                                    bank=path_bank if args.bank else None,
+                                    optimizer=optimizer, agree=args.agree,
+                                    coarse=args.coarse, candidates=args.candidates)
+
+            # Inference with stairway plot 2
+            elif args.stairway:
+                save_stairway_inference(simulation, model=args.model, fold=args.fold)
+
+            # Inference with SMC++
+            elif args.smc:
+                save_smc_inference(simulation, model=args.model)
 
     elif args.analyse == 'optsmc':
         length = [1e2, 2.5e4, 5e4, 7.5e4, 1e5, 2.5e5, 5e5, 7.5e5, 1e6, 2.5e6, 5e6][args.job-1]
@@ -1176,7 +1722,7 @@ def main():
         if "{}.zip".format(filout.rsplit('/', 1)[1]) \
            not in os.listdir("./Data/SMC/optimization_smc/data/"):
             # Generate data
-            data_optimization_smc(args.model, filout)
+            data_optimization_smc(args.model, filout, trees=args.trees)
 
         compute_optimization_smc(filin="{}.zip".format(filout), path_data=path_data)
 
@@ -1213,22 +1759,21 @@ def main():
         ).format(tmp['Tau'], tmp['Kappa'])
         path_length = "./Data/Msprime/length_factor-decline"
 
-        data = pd.DataFrame()
-        for snp in snps:
-            # Define length
-            length = length_from_file(path_length, tmp, mu=8e-2, snp=snp)
+        # Length for each SNPs target - the longest one is simulated and each target is then
+        # reached with the mutation rate mu * length / longest length
+        lengths = [length_from_file(path_length, tmp, mu=8e-2, snp=snp) for snp in snps]
+        rates = [8e-2 * length / max(lengths) for length in lengths]
 
-            # Convert params from log scale
-            params = ({k: np.power(10, v) for k, v in tmp.items()})
+        # Convert params from log scale
+        params = ({k: np.power(10, v) for k, v in tmp.items()})
 
-            # Parameters for the simulation
-            params.update(
-                simulation_parameters(sample=20, ne=1, rcb_rate=8e-2, mu=8e-2, length=length)
-            )
+        # Parameters for the simulation
+        params.update(
+            simulation_parameters(sample=20, ne=1, rcb_rate=8e-2, mu=8e-2, length=max(lengths))
+        )
 
-            # Generation of data
-            simulation = generate_sfs(params, model=ms.sudden_decline_model, nb_simu=1)
-            data = data.append(simulation, ignore_index=True)
+        # Generation of data - one ancestry for all the SNPs targets
+        data = generate_sfs_rates(params, model=ms.sudden_decline_model, rates=rates, nb_simu=1)
 
         # DataFrame to json
         data.to_json(filout)
@@ -4,7 +4,8 @@
 # -N msprime
 
 # Number of separate submissions to the cluster
-#$ -t 1-4225
+# Each task processes SGE_TASK_STEPSIZE cells of the grid
+#$ -t 1-4225:25
 
 # Short pour un job < 12h
 #$ -q long.q
@@ -22,6 +23,6 @@
 #$ -e $HOME/work/Err
 
 conda activate sei-3.8.5
-python /home/pimbert/work/Species_evolution_inference/sei/sei_migale.py data --model decline --job $SGE_TASK_ID --typ sfs
+python /home/pimbert/work/Species_evolution_inference/sei/sei_migale.py data --model decline --job-range $SGE_TASK_ID:$(( SGE_TASK_ID + SGE_TASK_STEPSIZE - 1 )) --typ sfs
 
 conda deactivate
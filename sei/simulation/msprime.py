@@ -5,19 +5,21 @@ Various scenarios are set up:
   -       Constant model: control scenario
   - Sudden decline model: decline of force kappa at a time tau
   -  Sudden growth model: growth of force kappa at a time tau
+  -      Migration model: migration from a second population of size kappa
+
+Each model is a msprime.Demography builder and all simulations go through sim_ancestry() and
+sim_mutations() of msprime 1.x - c.f. simulate.
 """
 
+import functools
+import hashlib
 import sys
 import numpy as np
 import msprime
 
 
-def msprime_debugger(configuration_pop, history, migration_matrix):
-    debugger = msprime.DemographyDebugger(
-        population_configurations=configuration_pop, demographic_events=history,
-        migration_matrix=migration_matrix
-    )
-    debugger.print_history()
+def msprime_debugger(demography):
+    print(demography.debug())
 
 
 def constant_model(params, debug):
@@ -30,22 +32,16 @@ def constant_model(params, debug):
 
     Return
     ------
-    configuration_pop: list
-        the configuration of the constant population - size, growth.
-    history: None
-        constant model so no history
+    demography: msprime.Demography
+        the constant population - size, growth.
     """
-    sample, pop = params['sample_size'], params['Ne']
-
-    configuration_pop = [
-        msprime.PopulationConfiguration(sample_size=sample, initial_size=pop, growth_rate=0)
-    ]
-    history, migration_matrix = None, None
+    demography = msprime.Demography()
+    demography.add_population(initial_size=params['Ne'], growth_rate=0)
 
     if debug:
-        msprime_debugger(configuration_pop, history, migration_matrix)
+        msprime_debugger(demography)
 
-    return configuration_pop, history, migration_matrix
+    return demography
 
 
 def sudden_decline_model(params, debug):
@@ -60,28 +56,23 @@ def sudden_decline_model(params, debug):
 
     Return
     ------
-    configuration_pop: list
-        the initial configuration of the population, i.e. at time 0
-    history: list
-        the observed demographic change in the population at tau time - decline of force kappa
+    demography: msprime.Demography
+        the population at time 0 and its change at tau time - decline of force kappa
     """
-    sample, pop, tau, kappa = \
-        params['sample_size'], params['Ne'], params['Tau'], params['Kappa']
+    pop, tau, kappa = params['Ne'], params['Tau'], params['Kappa']
 
-    configuration_pop = [
-        msprime.PopulationConfiguration(sample_size=sample, initial_size=pop, growth_rate=0)
-    ]
+    demography = msprime.Demography()
+    demography.add_population(initial_size=pop, growth_rate=0)
 
     # Ancestral population
-    history = [
-        msprime.PopulationParametersChange(time=tau, initial_size=pop*kappa, growth_rate=0)
-    ]
-    migration_matrix = None
+    demography.add_population_parameters_change(
+        time=tau, population=0, initial_size=pop*kappa, growth_rate=0
+    )
 
     if debug:
-        msprime_debugger(configuration_pop, history, migration_matrix)
+        msprime_debugger(demography)
 
-    return configuration_pop, history, migration_matrix
+    return demography
 
 
 def sudden_growth_model(params, debug):
@@ -96,26 +87,21 @@ def sudden_growth_model(params, debug):
 
     Return
     ------
-    configuration_pop: list
-        the initial configuration of the population, i.e. at time 0
-    history: list
-        the observed demographic change in the population at tau time - growth of force kappa
+    demography: msprime.Demography
+        the population at time 0 and its change at tau time - growth of force kappa
     """
-    sample, pop, tau, kappa = \
-        params['sample_size'], params['Ne'], params['Tau'], params['Kappa']
+    pop, tau, kappa = params['Ne'], params['Tau'], params['Kappa']
 
-    configuration_pop = [
-        msprime.PopulationConfiguration(sample_size=sample, initial_size=pop, growth_rate=0)
-    ]
-    history = [
-        msprime.PopulationParametersChange(time=tau, initial_size=pop/kappa, growth_rate=0)
-    ]
-    migration_matrix = None
+    demography = msprime.Demography()
+    demography.add_population(initial_size=pop, growth_rate=0)
+    demography.add_population_parameters_change(
+        time=tau, population=0, initial_size=pop/kappa, growth_rate=0
+    )
 
     if debug:
-        msprime_debugger(configuration_pop, history, migration_matrix)
+        msprime_debugger(demography)
 
-    return configuration_pop, history, migration_matrix
+    return demography
 
 
 def twopops_migration_model(params, debug):
@@ -136,41 +122,340 @@ def twopops_migration_model(params, debug):
       - Kappa: ratio of population's 1 size to population's 2 size
       - m12: migration rate into population 1 from 2
       - m21: migration rate into population 2 from 1 - by default it's 0
+
+    Return
+    ------
+    demography: msprime.Demography
+        the two populations and the migration rates between them
     """
-    sample, pop, kappa, m12, m21 = \
-        params['sample_size'], params['Ne'], params['Kappa'], params['m12'], \
-        params['m21']
+    pop, kappa, m12, m21 = params['Ne'], params['Kappa'], params['m12'], params['m21']
 
-    # The list of PopulationConfiguration instances describing the sampling configuration, the
-    # relative sizes and growth rates of the population to be simulated.
-    configuration_pop = [
-        msprime.PopulationConfiguration(sample_size=sample, initial_size=pop, growth_rate=0),
-        msprime.PopulationConfiguration(sample_size=0, initial_size=kappa*pop, growth_rate=0)
-    ]
-    history = None
-
-    # The matrix describing the rates of migration between all pairs of populations.
-    # It's an N*N matrix with N the number of populations defined in configuration_pop.
-    # Each element of the matrix Mj,k defines the fraction of population j that consists of
-    # migrants from population k in each generation.
-    migration_matrix = [
-        [0, m12],
-        [m21, 0]
-    ]
+    demography = msprime.Demography()
+    demography.add_population(initial_size=pop, growth_rate=0)
+    demography.add_population(initial_size=kappa*pop, growth_rate=0)
+
+    # The migration matrix is a N*N matrix with N the number of populations. Each element of the
+    # matrix Mj,k defines the fraction of population j that consists of migrants from
+    # population k in each generation - backward in time, lineages move from j to k.
+    demography.set_migration_rate(source=0, dest=1, rate=m12)
+    demography.set_migration_rate(source=1, dest=0, rate=m21)
+
+    if debug:
+        msprime_debugger(demography)
+
+    return demography
+
+
+@functools.lru_cache(maxsize=256)
+def cached_demography(model, key):
+    """
+    Demography of the model for the parameters key - c.f. model_demography.
+    """
+    return model(dict(key), False)
+
+
+def model_demography(model, params, debug=False):
+    """
+    Demography of a model, built once per parameter tuple.
+
+    The replicates of a cell and the chunks of a simulation share the same demography, so it's
+    only built the first time - sim_ancestry() doesn't modify it.
+
+    Parameter
+    ---------
+    model: function
+        (constant, sudden declin, sudden growth, etc.)
+    params: dictionary
+        the parameters of the simulation, only Ne, Tau, Kappa, m12 and m21 are used
+    debug: Boolean
+        1: print msprime debugger, 0: nothing
+
+    Return
+    ------
+    demography: msprime.Demography
+    """
+    key = tuple(sorted(
+        (k, v) for k, v in params.items() if k in ['Ne', 'Tau', 'Kappa', 'm12', 'm21']
+    ))
+    demography = cached_demography(model, key)
 
     if debug:
-        msprime_debugger(configuration_pop, history, migration_matrix)
+        msprime_debugger(demography)
+
+    return demography
+
+
+def simulate_ancestry(model, params, length, discrete_genome=False, debug=False,
+                      random_seed=None):
+    """
+    Simulation of ancestry with the method sim_ancestry() of msprime 1.x.
+
+    Some notes about the simulation of ancestry with the method sim_ancestry() of Msprime 1.x
+      - samples
+        The sample_size monoploid genomes are sampled from the first population
+      - ploidy
+        Sets the default number of sample nodes (i.e. monoploid genomes) per individual
+        Ploidy set to 2 means time to common ancestor in a population of size N is 2N
+        generations (which is the same as msprime 0.x)
+      - discrete_genome
+        If True that means mutations are placed at discrete, integer coordinates
+        If False that means mutations are placed at continuous, float coordinates (msprime 0.x)
+
+    Parameter
+    ---------
+    model: function
+        (constant, sudden declin, sudden growth, etc.)
+    params: dictionary
+        the parameters of the simulation, c.f. msprime_simulation
+    length: float
+        the length of the simulated region in bases
+    discrete_genome: Boolean
+        c.f. above
+    debug: Boolean
+        1: print msprime debugger, 0: nothing
+    random_seed: int
+        the random seed of the simulation, if None msprime picks one
+
+    Return
+    ------
+    ts: tskit.TreeSequence
+        the tree sequence without mutations
+    """
+    demography = model_demography(model, params, debug)
+
+    # Sampled monoploid genomes - the coalescent time scale is still the one of diploid
+    # individuals (ploidy=2), as in msprime 0.x
+    samples = [msprime.SampleSet(params['sample_size'], population=0, ploidy=1)]
+
+    return msprime.sim_ancestry(
+        samples=samples, demography=demography, ploidy=2, sequence_length=length,
+        discrete_genome=discrete_genome, recombination_rate=params['rcb_rate'],
+        random_seed=random_seed
+    )
+
+
+def simulate_mutations(ts, rate, discrete_genome=False, random_seed=None):
+    """
+    Genetic variation of a tree sequence with the method sim_mutations() of msprime 1.x.
+
+    Mutation model to use - binary mutation model
+      - Allele ["0", "1"]
+      - Root distribution [1., 0.], i.e. all ancestral states will be 0
+
+    Parameter
+    ---------
+    ts: tskit.TreeSequence
+        the tree sequence without mutations - c.f. simulate_ancestry
+    rate: float
+        the rate of mutations per unit of sequence length per generation
+    discrete_genome: Boolean
+        c.f. simulate_ancestry
+    random_seed: int
+        the random seed of the mutations, if None msprime picks one
+
+    Return
+    ------
+    mts: tskit.TreeSequence
+        the tree sequence with mutations
+    """
+    return msprime.sim_mutations(
+        tree_sequence=ts, rate=rate, model=msprime.BinaryMutationModel(),
+        discrete_genome=discrete_genome, random_seed=random_seed
+    )
+
+
+def simulate(model, params, length, discrete_genome=False, debug=False, random_seed=None):
+    """
+    Simulation of ancestry and mutations - the single simulation path of the models.
+
+    Parameter
+    ---------
+    model, params, length, discrete_genome, debug
+        c.f. simulate_ancestry
+    random_seed: int
+        the random seed of the simulation - the seeds of the ancestry and of the mutations
+        are drawn from it, if None msprime picks them
+
+    Return
+    ------
+    mts: tskit.TreeSequence
+        the tree sequence with mutations
+    """
+    rng = np.random.default_rng(random_seed)
+    seeds = [int(seed) for seed in rng.integers(1, 2**32 - 1, size=2)]
+
+    ts = simulate_ancestry(model, params, length, discrete_genome, debug, seeds[0])
+
+    return simulate_mutations(ts, params['mu'], discrete_genome, seeds[1])
+
+
+def base_seed(seed=None):
+    """
+    Base seed of a run of simulations, mixed into the seed of each replicate - c.f.
+    simulation_seed.
+
+    If seed is None, it's drawn at random - and printed, so the run can be reproduced - so
+    running the same simulations again gives new replicates, not duplicates.
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2**63)
+        print("Base seed: {}".format(seed))
+
+    return seed
+
+
+def simulation_seed(model, params, replicate, seed=0):
+    """
+    Deterministic random seed of a replicate for a given model and parameters.
+
+    The seed depends on the name of the model, on every parameter of the simulation - Tau,
+    Kappa, m12, m21 but also sample_size, Ne, mu, length, etc. - on the replicate index and on
+    the base seed of the run. So a set of replicates gives the same SFS whatever the number of
+    processes used to simulate it, and simulations of different models or parameters are
+    independent.
+
+    Parameter
+    ---------
+    model: function
+        (constant, sudden declin, sudden growth, etc.)
+    params: dictionary
+        the parameters of the simulation
+    replicate: int
+        the index of the replicate
+    seed: int
+        the base seed of the run, c.f. base_seed
+
+    Return
+    ------
+    seed: int
+        random seed between 1 and 2^32 - 1 (range accepted by msprime)
+    """
+    cell = [
+        "{}={:.6e}".format(key, params[key]) if isinstance(params[key], (int, float))
+        else "{}={}".format(key, params[key]) for key in sorted(params)
+    ]
+    digest = hashlib.sha256(
+        "{}-{}-{}-{}".format(model.__name__, "_".join(cell), replicate, seed).encode()
+    ).hexdigest()
+
+    return int(digest, 16) % (2**32 - 1) + 1
+
+
+def sfs_from_variants(tree_seq, sample_size):
+    """
+    Compute the SFS by iterating over each variant of the tree sequence.
+
+    It's the reference (and slow) way to compute the SFS - one call to np.unique per site.
+
+    Parameter
+    ---------
+    tree_seq: tskit.TreeSequence
+        the tree sequence with mutations
+    sample_size: int
+        the number of sampled monoploid genomes
+
+    Return
+    ------
+    sfs: list
+        Site frequency Spectrum (sfs) - allele mutation frequency
+    variants: list
+        List of position and genotypes for each variant
+    """
+    sfs, variants = [0] * (sample_size - 1), []
+    for variant in tree_seq.variants():
+        _, counts = np.unique(variant.genotypes, return_counts=True)
+
+        # Sites with [0 0 ... 0 0] or [1 1 ... 1 1] are not polymorphic
+        if len(counts) != 1:
+            # SFS
+            freq_mutation = counts[1]
+            sfs[freq_mutation-1] += 1
+
+            # Genotype
+            variants.append((variant.site.position, variant.genotypes))
+
+    return sfs, variants
+
+
+def sfs_from_genotypes(tree_seq, sample_size):
+    """
+    Compute the SFS in bulk from the genotype matrix of the tree sequence.
+
+    The number of derived alleles (allele 1) of each site is counted at once and the spectrum
+    is then the histogram of these counts. Sites with 0 or n derived alleles are not
+    polymorphic and are excluded, the same way as sfs_from_variants.
+
+    Parameter
+    ---------
+    tree_seq: tskit.TreeSequence
+        the tree sequence with mutations
+    sample_size: int
+        the number of sampled monoploid genomes
+
+    Return
+    ------
+    sfs: list
+        Site frequency Spectrum (sfs) - allele mutation frequency
+    variants: list
+        List of position and genotypes for each variant
+    """
+    # Matrix of m sites * n sampled genomes with 0 the ancestral state and 1 the derived one
+    genotypes = tree_seq.genotype_matrix()
+    derived = np.count_nonzero(genotypes, axis=1)
+
+    # Histogram of the derived allele count - remove 0/n & n/n
+    sfs = np.bincount(derived, minlength=sample_size + 1)[1:sample_size]
+
+    # Genotype of polymorphic sites
+    polymorphic = (derived > 0) & (derived < sample_size)
+    positions = tree_seq.tables.sites.position[polymorphic]
+    variants = list(zip(positions, genotypes[polymorphic]))
+
+    return [int(ele) for ele in sfs], variants
+
+
+def compute_sfs(tree_seq, sample_size, vectorized=True, debug=False):
+    """
+    Compute the SFS and the variants of a tree sequence.
+
+    Parameter
+    ---------
+    tree_seq: tskit.TreeSequence
+        the tree sequence with mutations
+    sample_size: int
+        the number of sampled monoploid genomes
+    vectorized: Boolean
+        True: the SFS is computed in bulk from the genotype matrix
+        False: the SFS is computed by iterating over each variant
+    debug: Boolean
+        If True and vectorized, check that both methods give exactly the same SFS
+
+    Return
+    ------
+    sfs: list
+        Site frequency Spectrum (sfs) - allele mutation frequency
+    variants: list
+        List of position and genotypes for each variant with 0 the ancestral state and 1 the
+        alternative one.
+    """
+    if not vectorized:
+        return sfs_from_variants(tree_seq, sample_size)
 
-    return configuration_pop, history, migration_matrix
+    sfs, variants = sfs_from_genotypes(tree_seq, sample_size)
 
+    if debug and sfs != sfs_from_variants(tree_seq, sample_size)[0]:
+        sys.exit("Error \"compute_sfs\": the vectorized SFS differs from the variant loop")
 
-def msprime_simulation(model, params, debug=False):
+    return sfs, variants
+
+
+def msprime_simulation(model, params, debug=False, vectorized=True, random_seed=None):
     """
-    Population simulation with msprime (msprime 0;x).
+    Population simulation with msprime (msprime 1.x).
 
-    IMPORTANT
-    This function is deprecated (but supported indefinitely); msprime_simulate_variants use
-    sim_ancestry() of msprime 1.x.
+    The simulation is the same as the former msprime.simulate() of msprime 0.x - sampled
+    monoploid genomes with the time scale of diploid individuals and infinite sites mutations
+    on a continuous genome - c.f. simulate.
 
     Parameter
     ---------
@@ -186,42 +471,158 @@ def msprime_simulation(model, params, debug=False):
     kappa: the growth or decline force
     debug: Boolean
         1: print msprime debugger, 0: nothing
-
-    Some notes about the simulation of ancestry with the method simulate of Msprime 0.x:
-        - sample_size
-          The sample_size is the number of monoploid genomes.
-          So if sample_size is set to 20 that means there are 2N=20 genomes sampled
+    vectorized: Boolean
+        1: compute the SFS in bulk from the genotype matrix, 0: loop over each variant
+    random_seed: int
+        the random seed of the simulation, if None msprime picks one
 
     Return
     ------
     sfs: list
         Site frequency Spectrum (sfs) - allele mutation frequency
-    variants: list
-        List of position and genotypes for each variant with 0 the ancestral state and 1 the
-        alternative one.
     """
-    demography = model(params, debug)
-
-    tree_seq = msprime.simulate(
-        length=params["length"], recombination_rate=params["rcb_rate"],
-        mutation_rate=params["mu"], population_configurations=demography[0],
-        demographic_events=demography[1], migration_matrix=demography[2]
-    )
+    tree_seq = simulate(model, params, params["length"], debug=debug, random_seed=random_seed)
 
     if debug:
         print(tree_seq.first().draw(format="unicode"))
 
-    sfs = [0] * (params["sample_size"] - 1)
-    for variant in tree_seq.variants():
-        # Generate SFS
-        _, counts = np.unique(variant.genotypes, return_counts=True)
-        freq_mutation = counts[1]-1
-        sfs[freq_mutation] += 1
+    sfs, _ = compute_sfs(tree_seq, params["sample_size"], vectorized, debug)
 
     return sfs  #, variants
 
 
-def msprime_simulate_variants(params, debug=False):
+def msprime_simulation_snp(model, params, snp, trim=False, random_seed=None):
+    """
+    Population simulation with msprime (msprime 1.x) until a target number of SNPs.
+
+    Independent chunks of genome are simulated until the target is reached, so the length of
+    the sequence doesn't have to be known beforehand - e.g. from the length factor of a
+    previous simulation of the whole grid. The first chunk is a pilot, with the expected length
+    for a thousandth of snp SNPs of a constant population - the density of SNPs of an expansion
+    or a decline may be orders of magnitude apart. The next chunks have the length for the
+    remaining SNPs at the density observed so far, for at most 10 times the SNPs already
+    simulated, so the target is only approached once the density is known.
+
+    Parameter
+    ---------
+    model: function
+        (constant, sudden declin, sudden growth, etc.)
+    params: dictionary
+        the parameters of the simulation, c.f. msprime_simulation - length is not used
+    snp: int
+        the target number of SNPs
+    trim: Boolean
+        If True, the last chunk ends at the SNP reaching the target, so the SFS has exactly
+        snp SNPs
+    random_seed: int
+        the random seed of the simulation, if None msprime picks one
+
+    Return
+    ------
+    sfs: list
+        Site frequency Spectrum (sfs) - allele mutation frequency
+    length: float
+        the total length of the simulated chunks
+    """
+    sample_size = params['sample_size']
+    rng = np.random.default_rng(random_seed)
+
+    # Pilot chunk - Watterson: E[S] = 4 * Ne * mu * L * sum(1/i) for i from 1 to n-1
+    harmonic = sum(1 / i for i in range(1, sample_size))
+    chunk = max(snp / 1000, 1) / (4 * params['Ne'] * params['mu'] * harmonic)
+
+    sfs, total, length = np.zeros(sample_size - 1, dtype=int), 0, 0.
+    while total < snp:
+        tree_seq = simulate(model, params, chunk, random_seed=int(rng.integers(1, 2**32 - 1)))
+
+        # Derived allele count of the polymorphic sites - sites sorted by position
+        derived = np.count_nonzero(tree_seq.genotype_matrix(), axis=1)
+        polymorphic = (derived > 0) & (derived < sample_size)
+        positions, derived = tree_seq.tables.sites.position[polymorphic], derived[polymorphic]
+
+        # Trim the chunk at the SNP reaching the target
+        if trim and total + len(derived) > snp:
+            positions, derived = positions[:snp - total], derived[:snp - total]
+            chunk = positions[-1]
+
+        sfs += np.bincount(derived, minlength=sample_size + 1)[1:sample_size]
+        total, length = total + len(derived), length + chunk
+
+        # Next chunk - length for the remaining SNPs at the observed density
+        chunk = min(snp - total, 10 * total) * length / total if total else 2 * chunk
+
+    return [int(ele) for ele in sfs], length
+
+
+def msprime_simulation_rates(model, params, rates, debug=False, vectorized=True,
+                             random_seed=None):
+    """
+    Population simulation with msprime for several mutation rates (msprime 1.x).
+
+    The ancestry only depends on the demography, the length and the recombination rate. So it's
+    simulated once - with sim_ancestry() - and mutations are then thrown on it at each rate -
+    with sim_mutations(). The SNPs of a replicate for various mutation rates or SNPs targets
+    are then mostly mutation-only work.
+
+    The simulation is the same as msprime_simulation - c.f. simulate.
+
+    Parameter
+    ---------
+    model: function
+        (constant, sudden declin, sudden growth, etc.)
+    params: dictionary
+        the parameters of the simulation, c.f. msprime_simulation - mu is not used
+    rates: list
+        the mutation rates per unit of sequence length per generation
+    debug: Boolean
+        1: print msprime debugger, 0: nothing
+    vectorized: Boolean
+        1: compute the SFS in bulk from the genotype matrix, 0: loop over each variant
+    random_seed: int
+        the random seed of the simulation, if None msprime picks one
+
+    Return
+    ------
+    sfs: list
+        the Site frequency Spectrum (sfs) for each mutation rate
+    """
+    # Seeds of the ancestry and of the mutations for each rate
+    rng = np.random.default_rng(random_seed)
+    seeds = [int(seed) for seed in rng.integers(1, 2**32 - 1, size=len(rates) + 1)]
+
+    # Simulation of ancestry
+    ts = simulate_ancestry(model, params, params['length'], debug=debug, random_seed=seeds[0])
+
+    # Mutations for each rate - binary mutation model, all ancestral states are 0
+    sfs = []
+    for rate, seed in zip(rates, seeds[1:]):
+        mts = simulate_mutations(ts, rate, random_seed=seed)
+        sfs.append(compute_sfs(mts, params["sample_size"], vectorized, debug)[0])
+
+    return sfs
+
+
+def msprime_simulate_trees(model, params, debug=False):
+    """
+    Population simulation with msprime for SMC++ (msprime 1.x), as a tree sequence.
+
+    The tree sequence is the whole simulation - the SFS, the variants and the VCF are derived
+    from it, c.f. compute_sfs - so it can be archived instead of them.
+
+    Parameter
+    ---------
+    model, params, debug
+        c.f. msprime_simulate_variants
+
+    Return
+    ------
+    mts: tskit.TreeSequence
+        the tree sequence with mutations at discrete, integer coordinates
+    """
+    return simulate(model, params, params['length'], discrete_genome=True, debug=debug)
+
+
+def msprime_simulate_variants(model, params, debug=False, vectorized=True):
     """
     Population simulation with msprime for SMC++ (msprime 1.x).
 
@@ -242,20 +643,8 @@ def msprime_simulate_variants(params, debug=False):
     kappa: the growth or decline force
     debug: Boolean
         1: print msprime debugger, 0: nothing
-
-    Some notes about the simulation of ancestry with the method sim_ancestry() of Msprime 1.x
-      - samples
-        The number of individual instead of the number of monoploid genomes (msprime 0.x)
-      - ploidy
-        Sets the default number of sample nodes (i.e. monoploid genomes) per individual
-        Ploidy set to 2 means time to common ancestor in a population of size N is 2N
-        generations (which is the same as msprime 0.x)
-      - discrete_genome
-        If True that means mutations are placed at discrete, integer coordinates
-        If False that means mutations are placed at continuous, float coordinates (msprime 0.x)
-
-      If samples is set to 10 and ploidy to 1 there are N=10 genomes sampled
-      If samples is set to 10 and ploidy to 2 there are 2N=20 genomes sampled
+    vectorized: Boolean
+        1: compute the SFS in bulk from the genotype matrix, 0: loop over each variant
 
     Return
     ------
@@ -265,49 +654,11 @@ def msprime_simulate_variants(params, debug=False):
         List of position and genotypes for each variant with 0 the ancestral state and 1 the
         alternative one.
     """
-    # Set up the population model
-    demography = msprime.Demography()
-
-    # Population actuelle au temps 0
-    demography.add_population(initial_size=params['Ne'], growth_rate=0.)
-
-    # Ancestral population
-    demography.add_population_parameters_change(
-        time=params['Tau'], population=0, initial_size=params['Ne']*params['Kappa'],
-        growth_rate=0.)
-
-    if debug:
-        print(demography.debug())
+    mts = msprime_simulate_trees(model, params, debug)
 
-    # Simulation of ancestry
-    ts = msprime.sim_ancestry(
-        samples=int(params['sample_size'] / 2), demography=demography, ploidy=2,
-        sequence_length=params['length'], discrete_genome=True,
-        recombination_rate=params['rcb_rate']
-    )
-
-    # Mutation model to use - binary mutation model
-    #   - Allele ["0", "1"]
-    #   - Root distribution [1., 0.], i.e. all ancestral states will be 0
-    mutation_model = msprime.BinaryMutationModel(state_independent=False)
-
-    # Genetic variation of the data with mutation
-    mts = msprime.sim_mutations(tree_sequence=ts, rate=params['mu'], model=mutation_model)
-
-    sfs, variants = [0] * (params["sample_size"] - 1), []
-    for variant in mts.variants():
-        _, counts = np.unique(variant.genotypes, return_counts=True)
-
-        if len(counts) != 1:
-            # SFS
-            freq_mutation = counts[1]
-            sfs[freq_mutation-1] += 1
-
-            # Genotype
-            variants.append((variant.site.position, variant.genotypes))
-            
-        # QUESTION: some variants with [0 0 ... 0 0] or [1 1 ... 1 1], je ne comprends pas ?
-        # print(variant.site.position, variant.alleles, variant.genotypes)
+    # With a discrete genome, several mutations can hit the same site - some variants with
+    # [0 0 ... 0 0] or [1 1 ... 1 1], they're not polymorphic and removed by compute_sfs
+    sfs, variants = compute_sfs(mts, params["sample_size"], vectorized, debug)
 
     return sfs, variants
 